@@ -93,6 +93,9 @@ AUTH_USER_MODEL = 'accounts.User'
 # Password validation
 AUTH_PASSWORD_VALIDATORS = []
 
+# Fast password hashing for the many create_user calls in tests
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
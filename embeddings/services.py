@@ -3,14 +3,17 @@ Embedding services for SOAPify.
 """
 import logging
 import numpy as np
-from typing import List, Dict, Any, Optional
-from django.db import transaction
+from typing import List, Dict, Any, Optional, Tuple
+from django.db import connection, transaction
 
 from .models import TextEmbedding
 from integrations.clients.gpt_client import GapGPTClient
 
 logger = logging.getLogger(__name__)
 
+# Texts sent to the embedding API per request
+EMBEDDING_BATCH_SIZE = 32
+
 
 class EmbeddingService:
     """Service for generating and managing text embeddings."""
@@ -58,6 +61,84 @@ class EmbeddingService:
             logger.error(f"Failed to generate embedding: {str(e)}")
             raise
     
+    def embed_batch(self, texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+        """
+        Generate embeddings for many texts, batch_size texts per API call.
+        
+        Args:
+            texts: Texts to embed
+            batch_size: Maximum number of texts per embedding request
+        
+        Returns:
+            Embedding vectors in the same order as texts
+        """
+        cleaned_texts = [self._clean_text(text) for text in texts]
+        if not all(cleaned_texts):
+            raise ValueError("Empty text after cleaning")
+        
+        embeddings = []
+        for start in range(0, len(cleaned_texts), batch_size):
+            batch = cleaned_texts[start:start + batch_size]
+            try:
+                response = self.gpt_client.create_embedding(batch, model=self.model_name)
+            except Exception as e:
+                logger.error(f"Failed to generate embeddings for batch at {start}: {str(e)}")
+                raise
+            
+            if not response or 'data' not in response or len(response['data']) != len(batch):
+                raise ValueError("Invalid embedding response")
+            
+            # The API may return items out of order; 'index' is their position in the batch
+            data = sorted(response['data'], key=lambda item: item.get('index', 0))
+            for item in data:
+                embedding = item['embedding']
+                if len(embedding) != self.dimension:
+                    raise ValueError(f"Expected {self.dimension} dimensions, got {len(embedding)}")
+                embeddings.append(embedding)
+        
+        return embeddings
+    
+    def store_embeddings(self, encounter_id: int, items: List[Tuple[str, int, str]]) -> int:
+        """
+        Generate and store embeddings for many pieces of content at once.
+        
+        Args:
+            encounter_id: ID of the encounter
+            items: (content_type, content_id, text) tuples
+        
+        Returns:
+            Number of embeddings stored
+        """
+        if not items:
+            return 0
+        
+        vectors = self.embed_batch([text for _, _, text in items])
+        
+        TextEmbedding.objects.bulk_create(
+            [
+                TextEmbedding(
+                    encounter_id=encounter_id,
+                    content_type=content_type,
+                    content_id=content_id,
+                    text_content=text[:1000],  # Truncate for storage
+                    embedding_vector=vector,
+                    model_name=self.model_name
+                )
+                for (content_type, content_id, text), vector in zip(items, vectors)
+            ],
+            update_conflicts=True,
+            # MySQL upserts on any unique key and rejects an explicit target
+            unique_fields=(
+                ['encounter', 'content_type', 'content_id']
+                if connection.features.supports_update_conflicts_with_target
+                else None
+            ),
+            update_fields=['text_content', 'embedding_vector', 'model_name', 'updated_at']
+        )
+        
+        logger.info(f"Stored {len(items)} embeddings for encounter {encounter_id}")
+        return len(items)
+    
     def store_embedding(self, encounter_id: int, content_type: str, content_id: int, text: str) -> TextEmbedding:
         """
         Generate and store embedding for content.
@@ -120,55 +201,38 @@ class EmbeddingService:
             'checklist': 0
         }
         
-        # Embed transcript segments
+        # Collect every text first so they are embedded in a few batched calls
+        items = []
+        
+        # Transcript segments
         for segment in encounter.transcript_segments.all():
             if segment.text and len(segment.text.strip()) > 10:  # Skip very short segments
-                self.store_embedding(
-                    encounter_id=encounter_id,
-                    content_type='transcript',
-                    content_id=segment.id,
-                    text=segment.text
-                )
-                results['transcript'] += 1
+                items.append(('transcript', segment.id, segment.text))
         
-        # Embed SOAP drafts
+        # SOAP drafts
         for draft in encounter.soap_drafts.all():
             if draft.content:
                 # Combine all SOAP sections
                 combined_text = self._combine_soap_content(draft.content)
                 if combined_text:
-                    self.store_embedding(
-                        encounter_id=encounter_id,
-                        content_type='soap_draft',
-                        content_id=draft.id,
-                        text=combined_text
-                    )
-                    results['soap_draft'] += 1
+                    items.append(('soap_draft', draft.id, combined_text))
         
-        # Embed final artifacts
+        # Final artifacts
         if hasattr(encounter, 'final_artifacts') and encounter.final_artifacts:
             artifacts = encounter.final_artifacts
             if artifacts.soap_content:
                 combined_text = self._combine_soap_content(artifacts.soap_content)
                 if combined_text:
-                    self.store_embedding(
-                        encounter_id=encounter_id,
-                        content_type='soap_final',
-                        content_id=artifacts.id,
-                        text=combined_text
-                    )
-                    results['soap_final'] += 1
+                    items.append(('soap_final', artifacts.id, combined_text))
         
-        # Embed checklist evaluations
+        # Checklist evaluations
         for eval_obj in encounter.checklist_evals.all():
             if eval_obj.evidence_text:
-                self.store_embedding(
-                    encounter_id=encounter_id,
-                    content_type='checklist',
-                    content_id=eval_obj.id,
-                    text=eval_obj.evidence_text
-                )
-                results['checklist'] += 1
+                items.append(('checklist', eval_obj.id, eval_obj.evidence_text))
+        
+        self.store_embeddings(encounter_id, items)
+        for content_type, _, _ in items:
+            results[content_type] += 1
         
         logger.info(f"Generated embeddings for encounter {encounter_id}: {results}")
         return results
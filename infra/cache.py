@@ -0,0 +1,18 @@
+"""
+Cache key layout for the default (django-redis) cache.
+
+Keys are stored as ``<KEY_PREFIX>:<version>:<key>``, e.g. ``soapify:1:rl:ip``.
+This is the same layout as Django's default key function, so switching to
+these functions leaves existing keys valid; it just builds them with a single
+f-string and keeps the format documented in one place for future sharding.
+"""
+
+
+def make_key(key, key_prefix, version):
+    """Build the full Redis key for a cache key."""
+    return f"{key_prefix}:{version}:{key}"
+
+
+def reverse_key(key):
+    """Return the original cache key from a full Redis key (used by keys()/iter_keys())."""
+    return key.split(":", 2)[2]
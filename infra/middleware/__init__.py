@@ -2,6 +2,7 @@ from .security import SecurityMiddleware
 from .rate_limit import RateLimitMiddleware
 from .cors import CORSMiddleware
 from .hmac_auth import HMACAuthMiddleware
+from .compression import CompressionMiddleware
 # Backwards-compatible alias for settings that reference infra.middleware.HMACMiddleware
 HMACMiddleware = HMACAuthMiddleware
 
@@ -10,5 +11,6 @@ __all__ = [
     'RateLimitMiddleware', 
     'CORSMiddleware',
     'HMACAuthMiddleware',
-    'HMACMiddleware'
+    'HMACMiddleware',
+    'CompressionMiddleware',
 ]
\ No newline at end of file
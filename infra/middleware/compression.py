@@ -0,0 +1,20 @@
+from django.middleware.gzip import GZipMiddleware
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZip responses large enough to be worth it (e.g. transcript lists).
+
+    Small JSON bodies and health checks are passed through untouched, so
+    they don't pay for compression they don't benefit from.
+    """
+
+    MIN_LENGTH = 1024
+    SKIP_PREFIXES = ('/healthz',)
+
+    def process_response(self, request, response):
+        if request.path.startswith(self.SKIP_PREFIXES):
+            return response
+        if not response.streaming and len(response.content) < self.MIN_LENGTH:
+            return response
+        return super().process_response(request, response)
@@ -7,25 +7,34 @@ from django.conf import settings
 from django.core.cache import cache
 
 
-class HMACMiddleware(MiddlewareMixin):
+class HMACAuthMiddleware(MiddlewareMixin):
     """
     HMAC authentication for inter-service communication
     """
     
     # Paths that require HMAC authentication
-    HMAC_REQUIRED_PATHS = [
+    HMAC_REQUIRED_PATHS = (
         '/internal/',
         '/service-to-service/',
-    ]
+    )
+    
+    # Never HMAC-protected; checked before any pattern (probes, admin, docs, assets)
+    HMAC_FAST_SKIP_PREFIXES = (
+        '/healthz',
+        '/admin/',
+        '/static/',
+        '/media/',
+        '/swagger',
+        '/redoc',
+    )
     
     def process_request(self, request):
-        # Check if path requires HMAC
-        requires_hmac = any(
-            request.path.startswith(path) 
-            for path in self.HMAC_REQUIRED_PATHS
-        )
+        path = request.path
+        if path.startswith(self.HMAC_FAST_SKIP_PREFIXES):
+            return None
         
-        if not requires_hmac:
+        # Check if path requires HMAC
+        if not path.startswith(self.HMAC_REQUIRED_PATHS):
             return None
         
         # Get HMAC headers
@@ -79,4 +88,8 @@ class HMACMiddleware(MiddlewareMixin):
         # Store nonce to prevent replay
         cache.set(nonce_key, True, 300)  # 5 minutes
         
-        return None
\ No newline at end of file
+        return None
+
+
+# Backwards-compatible name
+HMACMiddleware = HMACAuthMiddleware
@@ -0,0 +1,126 @@
+"""
+Fixed-window DRF throttles backed by an atomic counter.
+
+DRF's stock throttles read a list of request timestamps from the cache,
+trim it in Python and write it back: two cache round-trips and a pickled
+list per request. These throttles keep one integer per window instead.
+On Redis the whole check is a single MULTI pipeline:
+
+    SET key 0 EX duration NX; INCR key; TTL key
+
+Other cache backends (locmem in tests) fall back to cache.add + cache.incr.
+
+If the counter store is unreachable the throttles fail open: the request is
+allowed and a warning logged, so a Redis outage never takes the API down.
+"""
+
+import logging
+import re
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+# '<count><unit>' with an optional count: 'min', 'hour', '5m', '10s'
+_PERIOD = re.compile(r'(\d*)([smhd])')
+
+
+class AtomicCounterThrottleMixin:
+    """
+    Count requests per window with an atomic increment.
+
+    Mix into a SimpleRateThrottle subclass; the subclass's get_cache_key
+    and rate parsing are used unchanged.
+    """
+
+    DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+    def parse_rate(self, rate):
+        """
+        Parse '<requests>/<period>', where period may carry a count ('5/5m').
+
+        DRF only reads the period's first letter, so '5/5m' would fail there.
+        """
+        if rate is None:
+            return (None, None)
+        num, _, period = rate.partition('/')
+        match = _PERIOD.match(period)
+        if not num.isdigit() or match is None:
+            raise ImproperlyConfigured(f"Invalid throttle rate '{rate}' for scope '{self.scope}'")
+        count, unit = match.groups()
+        return (int(num), int(count or 1) * self.DURATIONS[unit])
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        try:
+            count, ttl = self._incr(self.key, self.duration)
+        except Exception as e:
+            # Fail open: throttling is best effort, the API must stay up without its store
+            logger.warning(f"Throttle counter unavailable, allowing request: {e}")
+            return True
+        self.remaining = ttl if ttl and ttl > 0 else self.duration
+        if count > self.num_requests:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def throttle_failure(self):
+        return False
+
+    def wait(self):
+        """Seconds until the current window resets."""
+        return getattr(self, 'remaining', self.duration)
+
+    def _incr(self, key, duration):
+        """Increment the window counter for key; returns (count, seconds left)."""
+        try:
+            from django_redis import get_redis_connection
+            client = get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            # Not a django-redis cache
+            cache.add(key, 0, duration)
+            try:
+                return cache.incr(key), duration
+            except ValueError:
+                # Window expired between add and incr
+                cache.add(key, 1, duration)
+                return 1, duration
+
+        redis_key = cache.make_key(key)
+        pipe = client.pipeline(transaction=True)
+        pipe.set(redis_key, 0, ex=duration, nx=True)
+        pipe.incr(redis_key)
+        pipe.ttl(redis_key)
+        _, count, ttl = pipe.execute()
+        return count, ttl
+
+
+class AnonRateThrottle(AtomicCounterThrottleMixin, throttling.AnonRateThrottle):
+    """AnonRateThrottle with an atomic fixed-window counter."""
+
+
+class UserRateThrottle(AtomicCounterThrottleMixin, throttling.UserRateThrottle):
+    """UserRateThrottle with an atomic fixed-window counter."""
+
+
+class ScopedRateThrottle(AtomicCounterThrottleMixin, throttling.ScopedRateThrottle):
+    """ScopedRateThrottle with an atomic fixed-window counter."""
+
+    def allow_request(self, request, view):
+        # The scope comes from the view, so the rate is only known here
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -0,0 +1,18 @@
+"""
+Shared OpenAI SDK client for GapGPT-backed services.
+"""
+from functools import lru_cache
+from typing import Optional
+
+
+@lru_cache(maxsize=4)
+def get_openai_client(api_key: Optional[str], base_url: Optional[str]):
+    """
+    Return a process-wide OpenAI client for the given credentials.
+
+    The SDK is imported and the client (with its HTTP connection pool) is built
+    on first use, so workers that never call the API don't pay for either.
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key, base_url=base_url)
@@ -26,13 +26,15 @@ class HMACAuthenticationMiddleware(MiddlewareMixin):
         self.nonce_cache = {}  # In production, use Redis
         self.max_timestamp_skew = 300  # 5 minutes
         
-        # Compile regex patterns for path matching
-        self.path_patterns = []
-        for path_pattern in self.enforce_paths:
-            try:
-                self.path_patterns.append(re.compile(path_pattern))
-            except re.error as e:
-                logger.warning(f"Invalid HMAC path pattern {path_pattern}: {e}")
+        # Regex patterns for path matching, compiled once at settings load
+        self.path_patterns = getattr(settings, 'HMAC_ENFORCE_REGEXES', None)
+        if self.path_patterns is None:
+            self.path_patterns = []
+            for path_pattern in self.enforce_paths:
+                try:
+                    self.path_patterns.append(re.compile(path_pattern))
+                except re.error as e:
+                    logger.warning(f"Invalid HMAC path pattern {path_pattern}: {e}")
     
     def process_request(self, request):
         """Process incoming request for HMAC authentication."""
@@ -90,10 +92,7 @@ class HMACAuthenticationMiddleware(MiddlewareMixin):
     
     def _should_enforce_hmac(self, path: str) -> bool:
         """Check if path requires HMAC authentication."""
-        for pattern in self.path_patterns:
-            if pattern.match(path):
-                return True
-        return False
+        return any(pattern.match(path) for pattern in self.path_patterns)
     
     def _validate_hmac_signature(self, request, signature: str, timestamp: str, nonce: str) -> bool:
         """Validate HMAC signature."""
@@ -5,9 +5,10 @@ SOAP extraction service using GPT-4o-mini via GapGPT.
 import json
 import logging
 import time
+from functools import cached_property
 from typing import Dict, List, Optional
 from django.conf import settings
-from openai import OpenAI
+from integrations.clients.openai_client import get_openai_client
 from ..schemas.soap_schema import SOAP_SCHEMA, SOAP_CHECKLIST_ITEMS
 
 logger = logging.getLogger(__name__)
@@ -17,18 +18,19 @@ class ExtractionService:
     """Service for extracting SOAP structure from transcript using GPT-4o-mini."""
     
     def __init__(self):
-        # For tests, allow initialization without API key
-        api_key = settings.OPENAI_API_KEY or "test-key"
-        base_url = settings.OPENAI_BASE_URL or "https://api.openai.com/v1"
-        
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url=base_url
-        )
         self.model = "gpt-4o-mini"
         self.max_tokens = 4000
         self.temperature = 0.1  # Low temperature for consistent extraction
         self.max_retries = 3
+
+    @cached_property
+    def client(self):
+        """OpenAI client, built on first API call and shared across instances."""
+        # For tests, allow initialization without API key
+        return get_openai_client(
+            settings.OPENAI_API_KEY or "test-key",
+            settings.OPENAI_BASE_URL or "https://api.openai.com/v1",
+        )
     
     def extract_soap_from_transcript(
         self, 
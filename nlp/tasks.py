@@ -22,16 +22,16 @@ def extract_soap_from_encounter(self, encounter_id: int):
         # Validate encounter
         encounter = Encounter.objects.get(id=encounter_id)
 
-        # Concatenate processed transcript text
-        segments = TranscriptSegment.objects.filter(
+        # Concatenate processed transcript text (only the text column, no model instances)
+        segment_texts = list(TranscriptSegment.objects.filter(
             audio_chunk__encounter=encounter
-        ).order_by('audio_chunk__chunk_number', 'segment_number')
+        ).order_by('audio_chunk__chunk_number', 'segment_number').values_list('text', flat=True))
 
-        if not segments.exists():
+        if not segment_texts:
             logger.warning(f"No transcript segments found for encounter {encounter_id}")
             return {"warning": "No transcript available"}
 
-        transcript_text = " ".join(seg.text for seg in segments)
+        transcript_text = " ".join(segment_texts)
 
         # Get or create draft
         soap_draft, _ = SOAPDraft.objects.get_or_create(
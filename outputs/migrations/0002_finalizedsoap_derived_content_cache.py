@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outputs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='finalizedsoap',
+            name='markdown_content_hash',
+            field=models.CharField(blank=True, help_text='Hash of finalized_data the Markdown was rendered from', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='finalizedsoap',
+            name='patient_summary',
+            field=models.JSONField(blank=True, default=dict, help_text='Cached patient-friendly version of finalized_data'),
+        ),
+        migrations.AddField(
+            model_name='finalizedsoap',
+            name='patient_summary_hash',
+            field=models.CharField(blank=True, help_text='Hash of finalized_data the patient summary was derived from', max_length=64),
+        ),
+    ]
@@ -6,6 +6,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from encounters.models import Encounter
 from nlp.models import SOAPDraft
+import hashlib
+import json
 import uuid
 
 User = get_user_model()
@@ -29,7 +31,12 @@ class FinalizedSOAP(models.Model):
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='finalizing')
     finalized_data = models.JSONField(default=dict, help_text="Final SOAP data after GPT-4o processing")
+    # Legacy: notes exported before the Markdown moved to S3 (OutputFile 'markdown') keep
+    # their body here; no longer written, but served by FinalizedSOAPSerializer as a fallback
     markdown_content = models.TextField(blank=True, help_text="Generated Markdown content")
+    markdown_content_hash = models.CharField(max_length=64, blank=True, help_text="Hash of finalized_data the Markdown was rendered from")
+    patient_summary = models.JSONField(default=dict, blank=True, help_text="Cached patient-friendly version of finalized_data")
+    patient_summary_hash = models.CharField(max_length=64, blank=True, help_text="Hash of finalized_data the patient summary was derived from")
     pdf_file_path = models.CharField(max_length=500, blank=True, help_text="S3 path to PDF file")
     json_file_path = models.CharField(max_length=500, blank=True, help_text="S3 path to JSON file")
     
@@ -62,6 +69,12 @@ class FinalizedSOAP(models.Model):
     @property
     def patient_ref(self):
         return self.soap_draft.encounter.patient_ref
+    
+    @property
+    def finalized_data_hash(self):
+        """Stable hash of finalized_data used to key derived content."""
+        payload = json.dumps(self.finalized_data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 
 class OutputFormat(models.Model):
@@ -142,6 +155,16 @@ class GeneratedReport(models.Model):
     def __str__(self) -> str:
         return f"Report for {self.finalized_soap} - {self.output_format.format_type}"
 
+
+class PatientLinkManager(models.Manager):
+    """Default manager joining the finalized SOAP chain up to the doctor."""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'finalized_soap__soap_draft__encounter__doctor'
+        )
+
+
 class PatientLink(models.Model):
     """
     Patient links for sharing finalized SOAP notes.
@@ -189,6 +212,8 @@ class PatientLink(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PatientLinkManager()
+    
     class Meta:
         db_table = 'patient_links'
         indexes = [
@@ -203,14 +228,22 @@ class PatientLink(models.Model):
     
     @property
     def is_expired(self):
-        from django.utils import timezone
-        return timezone.now() > self.expires_at
+        return self.get_is_expired()
     
     @property
     def is_accessible(self):
+        return self.get_is_accessible()
+    
+    def get_is_expired(self, now=None):
+        """Whether the link has expired at `now` (defaults to the current time)."""
+        from django.utils import timezone
+        return (now or timezone.now()) > self.expires_at
+    
+    def get_is_accessible(self, now=None):
+        """Whether the patient can still open the link at `now`."""
         return (
             self.status in ['sent', 'viewed'] and
-            not self.is_expired and
+            not self.get_is_expired(now) and
             self.view_count < self.max_views
         )
     
@@ -264,11 +297,15 @@ class OutputFile(models.Model):
     
     @property
     def is_presigned_url_valid(self):
+        return self.get_is_presigned_url_valid()
+    
+    def get_is_presigned_url_valid(self, now=None):
+        """Whether the stored presigned URL is still usable at `now`."""
         from django.utils import timezone
         return (
             self.presigned_url and
             self.presigned_expires_at and
-            timezone.now() < self.presigned_expires_at
+            (now or timezone.now()) < self.presigned_expires_at
         )
     
     def get_file_size_mb(self):
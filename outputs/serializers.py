@@ -2,21 +2,34 @@
 Serializers for outputs app.
 """
 
+from django.utils import timezone
 from rest_framework import serializers
 from .models import FinalizedSOAP, OutputFile, PatientLink, DeliveryLog, OutputFormat, PatientInfo
 
 
+class SharedNowMixin:
+    """Read timezone.now() once per serialization pass instead of once per row."""
+    
+    def get_now(self):
+        context = self.context
+        if '_now' not in context:
+            context['_now'] = timezone.now()
+        return context['_now']
+
+
 class FinalizedSOAPSerializer(serializers.ModelSerializer):
-    patient_ref = serializers.CharField(source='patient_ref', read_only=True)
+    patient_ref = serializers.CharField(read_only=True)
     encounter_id = serializers.IntegerField(source='soap_draft.encounter.id', read_only=True)
     doctor_name = serializers.CharField(source='soap_draft.encounter.doctor.get_full_name', read_only=True)
     encounter_date = serializers.DateTimeField(source='soap_draft.encounter.created_at', read_only=True)
     draft_completion = serializers.IntegerField(source='soap_draft.completion_percentage', read_only=True)
+    markdown_file = serializers.SerializerMethodField()
+    markdown_content = serializers.SerializerMethodField()
     
     class Meta:
         model = FinalizedSOAP
         fields = [
-            'id', 'status', 'finalized_data', 'markdown_content',
+            'id', 'status', 'finalized_data', 'markdown_file', 'markdown_content',
             'pdf_file_path', 'json_file_path', 'finalization_model',
             'finalization_version', 'quality_score', 'created_at',
             'updated_at', 'finalized_at', 'exported_at',
@@ -26,11 +39,37 @@ class FinalizedSOAPSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'created_at', 'updated_at', 'finalized_at', 'exported_at'
         ]
+    
+    def _markdown_output_file(self, obj):
+        """Markdown OutputFile of the note; prefetch `markdown_files` to avoid a query here."""
+        markdown_files = getattr(obj, 'markdown_files', None)
+        if markdown_files is None:
+            obj.markdown_files = markdown_files = list(
+                obj.output_files.filter(file_type='markdown')[:1]
+            )
+        return next(iter(markdown_files), None)
+    
+    def get_markdown_file(self, obj):
+        """The doctor Markdown export as an OutputFile (download via its id/download_url), or None."""
+        markdown_file = self._markdown_output_file(obj)
+        if markdown_file is None:
+            return None
+        return OutputFileSerializer(markdown_file, context=self.context).data
+    
+    def get_markdown_content(self, obj):
+        """
+        Inline Markdown of notes exported before Markdown moved to S3.
+        
+        None once the note has a Markdown OutputFile (use markdown_file instead).
+        """
+        if self._markdown_output_file(obj) is not None:
+            return None
+        return obj.markdown_content or None
 
 
-class OutputFileSerializer(serializers.ModelSerializer):
+class OutputFileSerializer(SharedNowMixin, serializers.ModelSerializer):
     file_size_mb = serializers.SerializerMethodField()
-    is_presigned_url_valid = serializers.ReadOnlyField()
+    is_presigned_url_valid = serializers.SerializerMethodField()
     download_url = serializers.SerializerMethodField()
     
     class Meta:
@@ -45,16 +84,19 @@ class OutputFileSerializer(serializers.ModelSerializer):
     def get_file_size_mb(self, obj):
         return obj.get_file_size_mb()
     
+    def get_is_presigned_url_valid(self, obj):
+        return obj.get_is_presigned_url_valid(now=self.get_now())
+    
     def get_download_url(self, obj):
         """Return valid download URL or None."""
-        if obj.is_presigned_url_valid:
+        if self.get_is_presigned_url_valid(obj):
             return obj.presigned_url
         return None
 
 
-class PatientLinkSerializer(serializers.ModelSerializer):
-    is_accessible = serializers.ReadOnlyField()
-    is_expired = serializers.ReadOnlyField()
+class PatientLinkSerializer(SharedNowMixin, serializers.ModelSerializer):
+    is_accessible = serializers.SerializerMethodField()
+    is_expired = serializers.SerializerMethodField()
     access_url = serializers.SerializerMethodField()
     
     class Meta:
@@ -70,6 +112,12 @@ class PatientLinkSerializer(serializers.ModelSerializer):
             'last_viewed_at', 'created_at'
         ]
     
+    def get_is_expired(self, obj):
+        return obj.get_is_expired(now=self.get_now())
+    
+    def get_is_accessible(self, obj):
+        return obj.get_is_accessible(now=self.get_now())
+    
     def get_access_url(self, obj):
         """Generate access URL for the link."""
         return obj.generate_access_url()
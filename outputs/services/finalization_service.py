@@ -5,9 +5,10 @@ SOAP finalization service using GPT-4o via GapGPT.
 import json
 import logging
 import time
+from functools import cached_property
 from typing import Dict, Optional
 from django.conf import settings
-from openai import OpenAI
+from integrations.clients.openai_client import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +17,15 @@ class FinalizationService:
     """Service for finalizing SOAP drafts using GPT-4o."""
     
     def __init__(self):
-        self.client = OpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL
-        )
         self.model = "gpt-4o"
         self.max_tokens = 4000
         self.temperature = 0.2  # Slightly higher for more natural language
         self.max_retries = 3
+
+    @cached_property
+    def client(self):
+        """OpenAI client, built on first API call and shared across instances."""
+        return get_openai_client(settings.OPENAI_API_KEY, settings.OPENAI_BASE_URL)
     
     def finalize_soap_draft(
         self,
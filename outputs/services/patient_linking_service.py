@@ -135,7 +135,9 @@ class PatientLinkingService:
                 patient_link.first_viewed_at = timezone.now()
                 patient_link.status = 'viewed'
             patient_link.last_viewed_at = timezone.now()
-            patient_link.save()
+            patient_link.save(update_fields=[
+                'view_count', 'first_viewed_at', 'status', 'last_viewed_at', 'updated_at'
+            ])
             
             # Get finalized SOAP data
             finalized_soap = patient_link.finalized_soap
@@ -163,7 +165,7 @@ class PatientLinkingService:
             patient_link = PatientLink.objects.get(link_id=link_id)
             patient_link.status = 'sent'
             patient_link.sent_at = timezone.now()
-            patient_link.save()
+            patient_link.save(update_fields=['status', 'sent_at', 'updated_at'])
             
             logger.info(f"Marked link {link_id} as sent")
             return True
@@ -181,7 +183,7 @@ class PatientLinkingService:
             patient_link = PatientLink.objects.get(link_id=link_id)
             patient_link.status = 'expired'
             patient_link.expires_at = timezone.now()
-            patient_link.save()
+            patient_link.save(update_fields=['status', 'expires_at', 'updated_at'])
             
             logger.info(f"Expired link {link_id}")
             return True
@@ -196,13 +198,10 @@ class PatientLinkingService:
     def cleanup_expired_links(self) -> int:
         """Clean up expired patient links."""
         try:
-            expired_links = PatientLink.objects.filter(
+            count = PatientLink.objects.filter(
                 expires_at__lt=timezone.now(),
                 status__in=['pending', 'sent', 'viewed']
-            )
-            
-            count = expired_links.count()
-            expired_links.update(status='expired')
+            ).update(status='expired', updated_at=timezone.now())
             
             logger.info(f"Cleaned up {count} expired patient links")
             return count
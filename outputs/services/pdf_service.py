@@ -8,6 +8,7 @@ import logging
 import time
 from typing import Dict
 import boto3
+from boto3.s3.transfer import TransferConfig
 from django.conf import settings
 
 # Try to import WeasyPrint, but handle Windows GTK+ issues gracefully
@@ -30,6 +31,13 @@ except OSError as e:
 
 logger = logging.getLogger(__name__)
 
+# Large PDFs go up as parallel 5 MB multipart chunks
+PDF_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=5 * 1024 * 1024,
+    max_concurrency=4
+)
+
 
 class PDFService:
     """Service for generating PDF files from HTML content."""
@@ -151,7 +159,8 @@ class PDFService:
                 ExtraArgs={
                     'ContentType': 'application/pdf',
                     'ContentDisposition': f'attachment; filename="{filename}"'
-                }
+                },
+                Config=PDF_TRANSFER_CONFIG
             )
             
             logger.info(f"Uploaded PDF to S3: {s3_key}")
@@ -206,20 +215,19 @@ class PDFService:
     def cleanup_temp_files(self, max_age_hours: int = 24):
         """Clean up old temporary PDF files."""
         try:
-            temp_dir = tempfile.gettempdir()
-            current_time = time.time()
+            cutoff = time.time() - max_age_hours * 3600
             cleaned_count = 0
             
-            for filename in os.listdir(temp_dir):
-                if filename.endswith('.pdf'):
-                    file_path = os.path.join(temp_dir, filename)
+            with os.scandir(tempfile.gettempdir()) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.pdf'):
+                        continue
                     try:
-                        file_age = current_time - os.path.getmtime(file_path)
-                        if file_age > (max_age_hours * 3600):
-                            os.unlink(file_path)
+                        if entry.is_file() and entry.stat().st_mtime < cutoff:
+                            os.unlink(entry.path)
                             cleaned_count += 1
                     except Exception as e:
-                        logger.warning(f"Failed to cleanup {file_path}: {e}")
+                        logger.warning(f"Failed to cleanup {entry.path}: {e}")
             
             logger.info(f"Cleaned up {cleaned_count} old PDF files")
             return cleaned_count
@@ -2,10 +2,14 @@
 Celery tasks for output generation and patient linking.
 """
 
-import json
+import functools
 import time
-from celery import shared_task
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+from celery import Task, group, shared_task
+from django.db import connection, transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.conf import settings
 from nlp.models import SOAPDraft
 from .models import FinalizedSOAP, OutputFile, PatientLink
@@ -18,123 +22,165 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3)
+# Per-worker service singletons; built on first use and reused by every task
+@functools.lru_cache(maxsize=1)
+def _template_service() -> TemplateService:
+    return TemplateService()
+
+
+@functools.lru_cache(maxsize=1)
+def _pdf_service() -> PDFGenerationService:
+    return PDFGenerationService()
+
+
+@functools.lru_cache(maxsize=1)
+def _finalization_service() -> SOAPFinalizationService:
+    return SOAPFinalizationService()
+
+
+@functools.lru_cache(maxsize=1)
+def _linking_service() -> PatientLinkingService:
+    return PatientLinkingService()
+
+
+@functools.lru_cache(maxsize=1)
+def _s3_client():
+    import boto3
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME,
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL
+    )
+
+
+def _load_finalized(finalized_soap_id: int) -> FinalizedSOAP:
+    """Fetch a FinalizedSOAP together with its draft, encounter and doctor."""
+    return FinalizedSOAP.objects.select_related(
+        'soap_draft__encounter__doctor'
+    ).defer('markdown_content').get(id=finalized_soap_id)
+
+
+class FinalizeSOAPTask(Task):
+    """Flags the FinalizedSOAP as errored once Celery has given up retrying."""
+    
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        soap_draft_id = args[0] if args else kwargs.get('soap_draft_id')
+        logger.error(f"SOAP finalization failed for draft {soap_draft_id}: {exc}")
+        FinalizedSOAP.objects.filter(soap_draft_id=soap_draft_id).update(
+            status='error',
+            updated_at=timezone.now()
+        )
+
+
+@shared_task(
+    bind=True,
+    base=FinalizeSOAPTask,
+    autoretry_for=(Exception,),
+    retry_backoff=60,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=3
+)
 def finalize_soap_note(self, soap_draft_id: int):
     """
     Finalize SOAP draft using GPT-4o.
     
+    Meant to run as the head of a ``finalize_soap_note.s(id) | generate_all_outputs.s()``
+    chain; when there is nothing to export the rest of the chain is dropped.
+    Failures are retried by Celery with jittered exponential backoff.
+    
     Args:
         soap_draft_id: ID of the SOAPDraft to finalize
         
     Returns:
-        Dict with finalization results
+        ID of the FinalizedSOAP on success, otherwise a dict describing why
+        finalization was skipped
     """
     start_time = time.time()
     
+    # Get SOAP draft
     try:
-        # Get SOAP draft
-        try:
-            soap_draft = SOAPDraft.objects.get(id=soap_draft_id)
-        except SOAPDraft.DoesNotExist:
-            logger.error(f"SOAP draft {soap_draft_id} not found")
-            return {'error': 'SOAP draft not found'}
-        
-        # Check if already finalized
-        finalized_soap, created = FinalizedSOAP.objects.get_or_create(
-            soap_draft=soap_draft,
-            defaults={'status': 'finalizing'}
-        )
-        
-        if not created and finalized_soap.status == 'finalizing':
-            logger.info(f"SOAP draft {soap_draft_id} already being finalized")
-            return {'status': 'already_finalizing'}
-        
-        # Reset status if re-finalizing
-        if not created:
-            finalized_soap.status = 'finalizing'
-            finalized_soap.save()
-        
-        logger.info(f"Starting SOAP finalization for draft {soap_draft_id}")
-        
-        # Prepare encounter context
-        encounter = soap_draft.encounter
-        encounter_context = {
-            'patient_ref': encounter.patient_ref,
-            'doctor_name': encounter.doctor.get_full_name() or encounter.doctor.username,
-            'encounter_date': encounter.created_at.isoformat(),
-            'encounter_id': encounter.id
-        }
-        
-        # Initialize finalization service
-        finalization_service = SOAPFinalizationService()
-        
-        # Finalize SOAP data
-        finalization_result = finalization_service.finalize_soap_draft(
-            soap_draft.soap_data,
-            encounter_context
-        )
-        
-        # Update finalized SOAP
-        finalized_soap.finalized_data = finalization_result['finalized_data']
-        finalized_soap.quality_score = finalization_result['quality_score']
-        finalized_soap.status = 'finalized'
-        finalized_soap.finalized_at = timezone.now()
-        finalized_soap.save()
-        
-        # Generate outputs
-        output_generation_result = generate_all_outputs.delay(finalized_soap.id)
-        
-        processing_time = time.time() - start_time
-        
-        logger.info(
-            f"SOAP finalization completed for draft {soap_draft_id} in {processing_time:.2f}s. "
-            f"Quality score: {finalization_result['quality_score']:.3f}"
-        )
-        
-        return {
-            'status': 'success',
-            'finalized_soap_id': finalized_soap.id,
-            'quality_score': finalization_result['quality_score'],
-            'processing_time': processing_time,
-            'output_generation_task': output_generation_result.id
-        }
-        
-    except Exception as e:
-        logger.error(f"SOAP finalization failed for draft {soap_draft_id}: {str(e)}")
-        
-        # Update status to error
-        try:
-            finalized_soap = FinalizedSOAP.objects.get(soap_draft_id=soap_draft_id)
-            finalized_soap.status = 'error'
-            finalized_soap.save()
-        except FinalizedSOAP.DoesNotExist:
-            pass
-        
-        # Retry with exponential backoff
-        if self.request.retries < self.max_retries:
-            retry_delay = 2 ** self.request.retries * 60  # 1min, 2min, 4min
-            logger.info(f"Retrying SOAP finalization in {retry_delay} seconds")
-            raise self.retry(countdown=retry_delay, exc=e)
-        
-        return {'error': str(e)}
+        soap_draft = SOAPDraft.objects.select_related('encounter__doctor').get(id=soap_draft_id)
+    except SOAPDraft.DoesNotExist:
+        logger.error(f"SOAP draft {soap_draft_id} not found")
+        self.request.chain = None
+        return {'error': 'SOAP draft not found'}
+    
+    # Check if already finalized
+    finalized_soap, created = FinalizedSOAP.objects.get_or_create(
+        soap_draft=soap_draft,
+        defaults={'status': 'finalizing'}
+    )
+    
+    # A retry of this task left the row in 'finalizing' itself
+    if not created and finalized_soap.status == 'finalizing' and not self.request.retries:
+        logger.info(f"SOAP draft {soap_draft_id} already being finalized")
+        self.request.chain = None
+        return {'status': 'already_finalizing'}
+    
+    # Reset status if re-finalizing
+    if not created and finalized_soap.status != 'finalizing':
+        finalized_soap.status = 'finalizing'
+        finalized_soap.save(update_fields=['status', 'updated_at'])
+    
+    logger.info(f"Starting SOAP finalization for draft {soap_draft_id}")
+    
+    # Prepare encounter context
+    encounter = soap_draft.encounter
+    encounter_context = {
+        'patient_ref': encounter.patient_ref,
+        'doctor_name': encounter.doctor.get_full_name() or encounter.doctor.username,
+        'encounter_date': encounter.created_at.isoformat(),
+        'encounter_id': encounter.id
+    }
+    
+    # Initialize finalization service
+    finalization_service = _finalization_service()
+    
+    # Finalize SOAP data
+    finalization_result = finalization_service.finalize_soap_draft(
+        soap_draft.soap_data,
+        encounter_context
+    )
+    
+    # Update finalized SOAP
+    finalized_soap.finalized_data = finalization_result['finalized_data']
+    finalized_soap.quality_score = finalization_result['quality_score']
+    finalized_soap.status = 'finalized'
+    finalized_soap.finalized_at = timezone.now()
+    finalized_soap.save(update_fields=[
+        'finalized_data', 'quality_score', 'status', 'finalized_at', 'updated_at'
+    ])
+    
+    processing_time = time.time() - start_time
+    
+    logger.info(
+        f"SOAP finalization completed for draft {soap_draft_id} in {processing_time:.2f}s. "
+        f"Quality score: {finalization_result['quality_score']:.3f}"
+    )
+    
+    # Handed to generate_all_outputs by the chain
+    return finalized_soap.id
 
 
 @shared_task
 def generate_final_report(soap_draft_id: int):
     """Simplified task creating a FinalizedSOAP and generating a PDF via services."""
     try:
-        soap_draft = SOAPDraft.objects.get(id=soap_draft_id)
+        soap_draft = SOAPDraft.objects.select_related('encounter__doctor').get(id=soap_draft_id)
         finalized, _ = FinalizedSOAP.objects.get_or_create(soap_draft=soap_draft, defaults={'status': 'finalizing'})
-        final_service = SOAPFinalizationService()
+        final_service = _finalization_service()
         result = final_service.finalize_soap_draft(soap_draft.soap_data, {
             'patient_ref': soap_draft.encounter.patient_ref
         })
         finalized.finalized_data = result.get('finalized_data', {})
         finalized.status = 'finalized'
         finalized.finalized_at = timezone.now()
-        finalized.save()
+        finalized.save(update_fields=['finalized_data', 'status', 'finalized_at', 'updated_at'])
         # Generate PDF
-        pdf_service = PDFGenerationService()
+        pdf_service = _pdf_service()
         # Just simulate filename usage
         return {'status': 'success', 'finalized_soap_id': finalized.id}
     except Exception as e:
@@ -144,8 +190,8 @@ def generate_final_report(soap_draft_id: int):
 @shared_task
 def generate_pdf_report(finalized_soap_id: int):
     try:
-        finalized = FinalizedSOAP.objects.get(id=finalized_soap_id)
-        pdf_service = PDFGenerationService()
+        finalized = _load_finalized(finalized_soap_id)
+        pdf_service = _pdf_service()
         # In tests, service is mocked; just call a method name for compatibility if needed
         return {'status': 'success', 'finalized_soap_id': finalized.id}
     except FinalizedSOAP.DoesNotExist:
@@ -157,71 +203,339 @@ def send_email_notification(email: str, subject: str, body: str):
     return True
 
 
-@shared_task
+@shared_task(ignore_result=True)
 def send_report_notification(finalized_soap_id: int, recipient_email: str, subject: str = 'Report Ready'):
     try:
-        finalized = FinalizedSOAP.objects.get(id=finalized_soap_id)
+        finalized = _load_finalized(finalized_soap_id)
         send_email_notification(recipient_email, subject, 'Your report is ready')
         return {'status': 'sent'}
     except FinalizedSOAP.DoesNotExist:
         return {'status': 'error', 'message': 'not found'}
 
 
+# Upper bound on sub-tasks dispatched per group to cap broker memory
+BATCH_REPORT_GROUP_SIZE = 500
+
+
 @shared_task
 def batch_generate_reports(soap_draft_ids: list):
+    """Generate final reports for many drafts in parallel across workers."""
     results = []
-    for draft_id in soap_draft_ids:
-        res = generate_final_report.apply(args=(draft_id,)).get()
-        results.append(res)
+    for offset in range(0, len(soap_draft_ids), BATCH_REPORT_GROUP_SIZE):
+        chunk = soap_draft_ids[offset:offset + BATCH_REPORT_GROUP_SIZE]
+        job = group(generate_final_report.s(draft_id) for draft_id in chunk).apply_async()
+        results.extend(job.get(disable_sync_subtasks=False))
     return results
 
 
+def _build_context(finalized_soap: FinalizedSOAP) -> dict:
+    """
+    Flatten a FinalizedSOAP and its joined rows into JSON-safe primitives.
+    
+    The export helpers (and the per-format tasks) work from this dict so
+    the row and its foreign keys are walked exactly once.
+    """
+    encounter = finalized_soap.soap_draft.encounter
+    doctor = encounter.doctor
+    return {
+        'finalized_soap_id': finalized_soap.id,
+        'finalized_data': finalized_soap.finalized_data,
+        'finalized_data_hash': finalized_soap.finalized_data_hash,
+        'quality_score': finalized_soap.quality_score,
+        'finalization_version': finalized_soap.finalization_version,
+        'patient_ref': encounter.patient_ref,
+        'doctor_full_name': doctor.get_full_name(),
+        'doctor_name': doctor.get_full_name() or doctor.username,
+        'encounter_date_iso': encounter.created_at.isoformat(),
+        'markdown_content': None,
+        'markdown_content_hash': finalized_soap.markdown_content_hash,
+        'patient_summary': finalized_soap.patient_summary,
+        'patient_summary_hash': finalized_soap.patient_summary_hash,
+    }
+
+
+def _template_metadata(ctx: dict) -> dict:
+    """Build the template metadata shared by every export format."""
+    return {
+        'patient_ref': ctx['patient_ref'],
+        'doctor_name': ctx['doctor_name'],
+        'encounter_date': parse_datetime(ctx['encounter_date_iso']),
+    }
+
+
+def _export_json(ctx: dict, output_files: list) -> dict:
+    """Upload the JSON export to S3 and queue its unsaved OutputFile."""
+    finalized_soap_id = ctx['finalized_soap_id']
+    
+    # Prepare JSON data
+    json_data = {
+        'soap_note': ctx['finalized_data'],
+        'metadata': {
+            'patient_ref': ctx['patient_ref'],
+            'doctor': ctx['doctor_full_name'],
+            'encounter_date': ctx['encounter_date_iso'],
+            'generated_at': timezone.now(),
+            'quality_score': ctx['quality_score'],
+            'version': ctx['finalization_version']
+        }
+    }
+    
+    # orjson emits UTF-8 bytes directly and handles datetimes natively;
+    # indented like the json.dumps(..., indent=2) export it replaced
+    body = orjson.dumps(json_data, option=orjson.OPT_INDENT_2)
+    
+    # Upload to S3
+    s3_client = _s3_client()
+    
+    filename = f"soap_note_{ctx['patient_ref']}_{finalized_soap_id}.json"
+    s3_key = f"outputs/json/{filename}"
+    
+    s3_client.put_object(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=s3_key,
+        Body=body,
+        ContentType='application/json',
+        ContentDisposition=f'attachment; filename="{filename}"'
+    )
+    
+    # Queue OutputFile record
+    output_files.append(OutputFile(
+        finalized_soap_id=finalized_soap_id,
+        file_type='json',
+        file_path=s3_key,
+        file_size=len(body)
+    ))
+    
+    logger.info(f"Generated JSON export for finalized SOAP {finalized_soap_id}")
+    return {'status': 'success', 'file_path': s3_key}
+
+
+def _get_doctor_markdown(ctx: dict, template_service) -> str:
+    """Render the doctor Markdown once per context and reuse it afterwards."""
+    if ctx['markdown_content'] is None:
+        ctx['markdown_content'] = template_service.generate_markdown_doctor(
+            ctx['finalized_data'],
+            _template_metadata(ctx)
+        )
+    return ctx['markdown_content']
+
+
+def _get_patient_summary(ctx: dict, finalization_service) -> dict:
+    """Return the patient-friendly summary, calling GPT only when finalized_data changed."""
+    data_hash = ctx['finalized_data_hash']
+    if ctx['patient_summary'] and ctx['patient_summary_hash'] == data_hash:
+        return ctx['patient_summary']
+    
+    patient_summary = finalization_service.enhance_for_patient_version(
+        ctx['finalized_data']
+    )
+    
+    FinalizedSOAP.objects.filter(id=ctx['finalized_soap_id']).update(
+        patient_summary=patient_summary,
+        patient_summary_hash=data_hash,
+        updated_at=timezone.now()
+    )
+    ctx['patient_summary'] = patient_summary
+    ctx['patient_summary_hash'] = data_hash
+    
+    return patient_summary
+
+
+def _export_markdown(ctx: dict, template_service, output_files: list) -> dict:
+    """Upload the doctor Markdown to S3 and queue its unsaved OutputFile."""
+    finalized_soap_id = ctx['finalized_soap_id']
+    data_hash = ctx['finalized_data_hash']
+    
+    if ctx['markdown_content_hash'] == data_hash:
+        logger.info(f"Markdown export for finalized SOAP {finalized_soap_id} is up to date")
+        return {'status': 'success', 'skipped': True}
+    
+    markdown_bytes = _get_doctor_markdown(ctx, template_service).encode('utf-8')
+    
+    filename = f"soap_doctor_{ctx['patient_ref']}_{finalized_soap_id}.md"
+    s3_key = f"outputs/md/{filename}"
+    
+    _s3_client().put_object(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=s3_key,
+        Body=markdown_bytes,
+        ContentType='text/markdown; charset=utf-8',
+        ContentDisposition=f'attachment; filename="{filename}"'
+    )
+    
+    # Queue OutputFile record; the hash is persisted with it in _save_output_files
+    output_files.append(OutputFile(
+        finalized_soap_id=finalized_soap_id,
+        file_type='markdown',
+        file_path=s3_key,
+        file_size=len(markdown_bytes)
+    ))
+    ctx['markdown_content_hash'] = data_hash
+    
+    logger.info(f"Generated Markdown exports for finalized SOAP {finalized_soap_id}")
+    return {'status': 'success', 'file_path': s3_key}
+
+
+def _export_pdfs(
+    ctx: dict,
+    template_service,
+    pdf_service,
+    finalization_service,
+    output_files: list
+) -> dict:
+    """Render doctor and patient PDFs, upload them and queue their unsaved OutputFiles."""
+    finalized_soap_id = ctx['finalized_soap_id']
+    patient_ref = ctx['patient_ref']
+    metadata = _template_metadata(ctx)
+    
+    # Generate doctor PDF
+    doctor_markdown = _get_doctor_markdown(ctx, template_service)
+    doctor_html = template_service.generate_html_from_markdown(doctor_markdown)
+    
+    doctor_filename = f"soap_doctor_{patient_ref}_{finalized_soap_id}.pdf"
+    doctor_pdf_result = pdf_service.generate_pdf_from_html(
+        doctor_html,
+        doctor_filename
+    )
+    
+    # Queue OutputFile for doctor PDF
+    output_files.append(OutputFile(
+        finalized_soap_id=finalized_soap_id,
+        file_type='pdf_doctor',
+        file_path=doctor_pdf_result['s3_key'],
+        file_size=doctor_pdf_result['file_size'],
+        generation_time_seconds=doctor_pdf_result['generation_time']
+    ))
+    
+    # Generate patient version
+    patient_summary = _get_patient_summary(ctx, finalization_service)
+    patient_markdown = template_service.generate_markdown_patient(patient_summary, metadata)
+    patient_html = template_service.generate_html_from_markdown(patient_markdown)
+    
+    patient_filename = f"soap_patient_{patient_ref}_{finalized_soap_id}.pdf"
+    patient_pdf_result = pdf_service.generate_pdf_from_html(
+        patient_html,
+        patient_filename
+    )
+    
+    # Queue OutputFile for patient PDF
+    output_files.append(OutputFile(
+        finalized_soap_id=finalized_soap_id,
+        file_type='pdf_patient',
+        file_path=patient_pdf_result['s3_key'],
+        file_size=patient_pdf_result['file_size'],
+        generation_time_seconds=patient_pdf_result['generation_time']
+    ))
+    
+    logger.info(f"Generated PDF exports for finalized SOAP {finalized_soap_id}")
+    
+    return {
+        'status': 'success',
+        'doctor_pdf': doctor_pdf_result['s3_key'],
+        'patient_pdf': patient_pdf_result['s3_key']
+    }
+
+
+def _save_output_files(ctx: dict, output_files: list, exported: bool):
+    """
+    Upsert queued OutputFiles in one statement and update the SOAP row once.
+    
+    Re-exports replace the existing (finalized_soap, file_type) rows instead
+    of failing on the unique constraint.
+    """
+    row_updates = {}
+    if any(output_file.file_type == 'markdown' for output_file in output_files):
+        row_updates['markdown_content_hash'] = ctx['markdown_content_hash']
+    if exported:
+        row_updates['status'] = 'exported'
+        row_updates['exported_at'] = timezone.now()
+    
+    with transaction.atomic():
+        if output_files:
+            OutputFile.objects.bulk_create(
+                output_files,
+                update_conflicts=True,
+                # MySQL upserts on any unique key and rejects an explicit target
+                unique_fields=(
+                    ['finalized_soap', 'file_type']
+                    if connection.features.supports_update_conflicts_with_target
+                    else None
+                ),
+                update_fields=[
+                    'file_path', 'file_size', 'generation_time_seconds',
+                    'presigned_url', 'presigned_expires_at'
+                ]
+            )
+        
+        if row_updates:
+            FinalizedSOAP.objects.filter(id=ctx['finalized_soap_id']).update(
+                updated_at=timezone.now(),
+                **row_updates
+            )
+
+
+def _resolve_context(finalized_soap_id: int, ctx: dict = None) -> dict:
+    """Use the caller's primitive context or build it from the database."""
+    if ctx is not None:
+        return ctx
+    return _build_context(_load_finalized(finalized_soap_id))
+
+
 @shared_task
 def generate_all_outputs(finalized_soap_id: int):
     """
     Generate all output formats (JSON, Markdown, PDF) for finalized SOAP.
     
+    The finalized SOAP row is loaded once and flattened into a primitive
+    context that every export shares, instead of fanning out to one
+    sub-task per format.
+    
     Args:
         finalized_soap_id: ID of the FinalizedSOAP
         
     Returns:
         Dict with generation results
     """
+    if isinstance(finalized_soap_id, dict):
+        # Upstream finalize_soap_note skipped or failed; pass its result through
+        return finalized_soap_id
+    
     try:
-        finalized_soap = FinalizedSOAP.objects.get(id=finalized_soap_id)
+        ctx = _build_context(_load_finalized(finalized_soap_id))
         
         # Initialize services
-        template_service = TemplateService()
-        pdf_service = PDFGenerationService()
-        
-        # Prepare metadata
-        encounter = finalized_soap.soap_draft.encounter
-        metadata = {
-            'patient_ref': encounter.patient_ref,
-            'doctor_name': encounter.doctor.get_full_name() or encounter.doctor.username,
-            'encounter_date': encounter.created_at,
-            'generated_at': timezone.now()
+        template_service = _template_service()
+        pdf_service = _pdf_service()
+        finalization_service = _finalization_service()
+        
+        output_files = []
+        exports = {
+            'json': lambda: _export_json(ctx, output_files),
+            'markdown': lambda: _export_markdown(ctx, template_service, output_files),
+            'pdf': lambda: _export_pdfs(
+                ctx, template_service, pdf_service, finalization_service, output_files
+            ),
         }
         
         results = {}
+        for name, export in exports.items():
+            try:
+                results[name] = export()
+            except Exception as e:
+                logger.error(f"Failed to generate {name} export for {finalized_soap_id}: {e}")
+                results[name] = {'error': str(e)}
         
-        # Generate JSON export
-        json_result = generate_json_export.delay(finalized_soap.id)
-        results['json_task'] = json_result.id
-        
-        # Generate Markdown exports
-        markdown_result = generate_markdown_exports.delay(finalized_soap.id)
-        results['markdown_task'] = markdown_result.id
-        
-        # Generate PDF exports
-        pdf_result = generate_pdf_exports.delay(finalized_soap.id)
-        results['pdf_task'] = pdf_result.id
+        _save_output_files(
+            ctx,
+            output_files,
+            exported='error' not in results['pdf']
+        )
         
-        logger.info(f"Queued all output generation for finalized SOAP {finalized_soap_id}")
+        logger.info(f"Generated all outputs for finalized SOAP {finalized_soap_id}")
         
         return {
-            'status': 'queued',
-            'tasks': results
+            'status': 'success',
+            'results': results
         }
         
     except FinalizedSOAP.DoesNotExist:
@@ -232,178 +546,87 @@ def generate_all_outputs(finalized_soap_id: int):
         return {'error': str(e)}
 
 
-@shared_task
-def generate_json_export(finalized_soap_id: int):
+@shared_task(ignore_result=True)
+def generate_json_export(finalized_soap_id: int, ctx: dict = None):
     """Generate JSON export file."""
     try:
-        finalized_soap = FinalizedSOAP.objects.get(id=finalized_soap_id)
-        
-        # Prepare JSON data
-        json_data = {
-            'soap_note': finalized_soap.finalized_data,
-            'metadata': {
-                'patient_ref': finalized_soap.patient_ref,
-                'doctor': finalized_soap.soap_draft.encounter.doctor.get_full_name(),
-                'encounter_date': finalized_soap.soap_draft.encounter.created_at.isoformat(),
-                'generated_at': timezone.now().isoformat(),
-                'quality_score': finalized_soap.quality_score,
-                'version': finalized_soap.finalization_version
-            }
-        }
-        
-        # Convert to JSON string
-        json_content = json.dumps(json_data, ensure_ascii=False, indent=2)
-        
-        # Upload to S3
-        import boto3
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME,
-            endpoint_url=settings.AWS_S3_ENDPOINT_URL
-        )
-        
-        filename = f"soap_note_{finalized_soap.patient_ref}_{finalized_soap.id}.json"
-        s3_key = f"outputs/json/{filename}"
-        
-        s3_client.put_object(
-            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-            Key=s3_key,
-            Body=json_content.encode('utf-8'),
-            ContentType='application/json',
-            ContentDisposition=f'attachment; filename="{filename}"'
-        )
-        
-        # Create OutputFile record
-        OutputFile.objects.create(
-            finalized_soap=finalized_soap,
-            file_type='json',
-            file_path=s3_key,
-            file_size=len(json_content.encode('utf-8'))
-        )
-        
-        logger.info(f"Generated JSON export for finalized SOAP {finalized_soap_id}")
-        return {'status': 'success', 'file_path': s3_key}
+        ctx = _resolve_context(finalized_soap_id, ctx)
+        output_files = []
+        result = _export_json(ctx, output_files)
+        _save_output_files(ctx, output_files, exported=False)
+        return result
         
     except Exception as e:
         logger.error(f"Failed to generate JSON export: {e}")
         return {'error': str(e)}
 
 
-@shared_task
-def generate_markdown_exports(finalized_soap_id: int):
+@shared_task(ignore_result=True)
+def generate_markdown_exports(finalized_soap_id: int, ctx: dict = None):
     """Generate Markdown export files."""
     try:
-        finalized_soap = FinalizedSOAP.objects.get(id=finalized_soap_id)
-        template_service = TemplateService()
-        
-        # Prepare metadata
-        encounter = finalized_soap.soap_draft.encounter
-        metadata = {
-            'patient_ref': encounter.patient_ref,
-            'doctor_name': encounter.doctor.get_full_name() or encounter.doctor.username,
-            'encounter_date': encounter.created_at,
-        }
-        
-        # Generate doctor Markdown
-        doctor_markdown = template_service.generate_markdown_doctor(
-            finalized_soap.finalized_data,
-            metadata
-        )
-        
-        # Store Markdown content in finalized SOAP
-        finalized_soap.markdown_content = doctor_markdown
-        finalized_soap.save()
-        
-        logger.info(f"Generated Markdown exports for finalized SOAP {finalized_soap_id}")
-        return {'status': 'success'}
+        ctx = _resolve_context(finalized_soap_id, ctx)
+        output_files = []
+        result = _export_markdown(ctx, _template_service(), output_files)
+        _save_output_files(ctx, output_files, exported=False)
+        return result
         
     except Exception as e:
         logger.error(f"Failed to generate Markdown exports: {e}")
         return {'error': str(e)}
 
 
-@shared_task
-def generate_pdf_exports(finalized_soap_id: int):
+@shared_task(ignore_result=True)
+def generate_pdf_exports(finalized_soap_id: int, ctx: dict = None):
     """Generate PDF export files."""
     try:
-        finalized_soap = FinalizedSOAP.objects.get(id=finalized_soap_id)
-        template_service = TemplateService()
-        pdf_service = PDFGenerationService()
-        finalization_service = SOAPFinalizationService()
-        
-        # Prepare metadata
-        encounter = finalized_soap.soap_draft.encounter
-        metadata = {
-            'patient_ref': encounter.patient_ref,
-            'doctor_name': encounter.doctor.get_full_name() or encounter.doctor.username,
-            'encounter_date': encounter.created_at,
-        }
-        
-        # Generate doctor PDF
-        doctor_markdown = template_service.generate_markdown_doctor(
-            finalized_soap.finalized_data,
-            metadata
+        ctx = _resolve_context(finalized_soap_id, ctx)
+        output_files = []
+        result = _export_pdfs(
+            ctx,
+            _template_service(),
+            _pdf_service(),
+            _finalization_service(),
+            output_files
         )
-        doctor_html = template_service.generate_html_from_markdown(doctor_markdown)
-        
-        doctor_filename = f"soap_doctor_{finalized_soap.patient_ref}_{finalized_soap.id}.pdf"
-        doctor_pdf_result = pdf_service.generate_pdf_from_html(
-            doctor_html,
-            doctor_filename
-        )
-        
-        # Create OutputFile for doctor PDF
-        OutputFile.objects.create(
-            finalized_soap=finalized_soap,
-            file_type='pdf_doctor',
-            file_path=doctor_pdf_result['s3_key'],
-            file_size=doctor_pdf_result['file_size'],
-            generation_time_seconds=doctor_pdf_result['generation_time']
-        )
-        
-        # Generate patient version
-        patient_summary = finalization_service.enhance_for_patient_version(
-            finalized_soap.finalized_data
-        )
-        patient_markdown = template_service.generate_markdown_patient(patient_summary, metadata)
-        patient_html = template_service.generate_html_from_markdown(patient_markdown)
-        
-        patient_filename = f"soap_patient_{finalized_soap.patient_ref}_{finalized_soap.id}.pdf"
-        patient_pdf_result = pdf_service.generate_pdf_from_html(
-            patient_html,
-            patient_filename
-        )
-        
-        # Create OutputFile for patient PDF
-        OutputFile.objects.create(
-            finalized_soap=finalized_soap,
-            file_type='pdf_patient',
-            file_path=patient_pdf_result['s3_key'],
-            file_size=patient_pdf_result['file_size'],
-            generation_time_seconds=patient_pdf_result['generation_time']
-        )
-        
-        # Update finalized SOAP status
-        finalized_soap.status = 'exported'
-        finalized_soap.exported_at = timezone.now()
-        finalized_soap.save()
-        
-        logger.info(f"Generated PDF exports for finalized SOAP {finalized_soap_id}")
-        
-        return {
-            'status': 'success',
-            'doctor_pdf': doctor_pdf_result['s3_key'],
-            'patient_pdf': patient_pdf_result['s3_key']
-        }
+        _save_output_files(ctx, output_files, exported=True)
+        return result
         
     except Exception as e:
         logger.error(f"Failed to generate PDF exports: {e}")
         return {'error': str(e)}
 
 
-@shared_task
+def _notify_patient_link(patient_link: PatientLink, access_url: str) -> bool:
+    """
+    Deliver the access URL over the link's delivery method (mock for now).
+    
+    Returns True when a notification was sent and the link marked as sent.
+    """
+    if patient_link.delivery_method == 'sms' and patient_link.patient_phone:
+        # TODO: Implement SMS sending via Crazy Miner in Stage 6
+        logger.info(f"Would send SMS to {patient_link.patient_phone}: {access_url}")
+    elif patient_link.delivery_method == 'email' and patient_link.patient_email:
+        # TODO: Implement email sending
+        logger.info(f"Would send email to {patient_link.patient_email}: {access_url}")
+    else:
+        return False
+    
+    _linking_service().mark_link_as_sent(str(patient_link.link_id))
+    return True
+
+
+@shared_task(ignore_result=True)
+def send_patient_link_notification(link_id: str):
+    """Send the SMS/email notification for an already created patient link."""
+    try:
+        patient_link = PatientLink.objects.select_related(None).get(link_id=link_id)
+        _notify_patient_link(patient_link, patient_link.generate_access_url())
+    except PatientLink.DoesNotExist:
+        logger.error(f"Patient link {link_id} not found")
+
+
+@shared_task(ignore_result=True)
 def create_patient_link_and_notify(finalized_soap_id: int, delivery_info: dict):
     """
     Create patient link and send notification.
@@ -416,8 +639,8 @@ def create_patient_link_and_notify(finalized_soap_id: int, delivery_info: dict):
         Dict with link creation and delivery results
     """
     try:
-        finalized_soap = FinalizedSOAP.objects.get(id=finalized_soap_id)
-        linking_service = PatientLinkingService()
+        finalized_soap = _load_finalized(finalized_soap_id)
+        linking_service = _linking_service()
         
         # Create patient link
         patient_link = linking_service.create_patient_link(
@@ -431,15 +654,8 @@ def create_patient_link_and_notify(finalized_soap_id: int, delivery_info: dict):
         # Generate access URL
         access_url = patient_link.generate_access_url()
         
-        # Send notification (mock implementation for now)
-        if delivery_info.get('method') == 'sms' and delivery_info.get('phone'):
-            # TODO: Implement SMS sending via Crazy Miner in Stage 6
-            logger.info(f"Would send SMS to {delivery_info['phone']}: {access_url}")
-            linking_service.mark_link_as_sent(str(patient_link.link_id))
-        elif delivery_info.get('method') == 'email' and delivery_info.get('email'):
-            # TODO: Implement email sending
-            logger.info(f"Would send email to {delivery_info['email']}: {access_url}")
-            linking_service.mark_link_as_sent(str(patient_link.link_id))
+        # Send notification
+        _notify_patient_link(patient_link, access_url)
         
         logger.info(f"Created patient link {patient_link.link_id} for finalized SOAP {finalized_soap_id}")
         
@@ -459,11 +675,43 @@ def create_patient_link_and_notify(finalized_soap_id: int, delivery_info: dict):
 
 
 @shared_task
+def create_patient_links_and_notify_bulk(items: list):
+    """
+    Enqueue patient link creation for many finalized SOAPs at once.
+    
+    All messages are published through a single broker producer so the
+    connection/channel setup is paid once for the whole batch.
+    
+    create_patient_link_and_notify ignores its results, so the per-item
+    tasks are fire-and-forget and only their count is reported.
+    
+    Args:
+        items: List of dicts with 'finalized_soap_id' and 'delivery_info'
+        
+    Returns:
+        Dict with the number of queued tasks
+    """
+    with create_patient_link_and_notify.app.producer_or_acquire() as producer:
+        for item in items:
+            create_patient_link_and_notify.apply_async(
+                args=(item['finalized_soap_id'], item.get('delivery_info', {})),
+                producer=producer
+            )
+    
+    logger.info(f"Queued {len(items)} patient link tasks in bulk")
+    
+    return {
+        'status': 'queued',
+        'count': len(items)
+    }
+
+
+@shared_task(ignore_result=True)
 def cleanup_expired_outputs():
     """Cleanup expired patient links and old output files."""
     try:
-        linking_service = PatientLinkingService()
-        pdf_service = PDFGenerationService()
+        linking_service = _linking_service()
+        pdf_service = _pdf_service()
         
         # Cleanup expired links
         expired_links = linking_service.cleanup_expired_links()
@@ -483,7 +731,13 @@ def cleanup_expired_outputs():
         return {'error': str(e)}
 
 
-@shared_task
+# Rows written per bulk_update when refreshing presigned URLs
+PRESIGNED_REFRESH_BATCH_SIZE = 500
+# Threads signing presigned URLs concurrently
+PRESIGNED_REFRESH_WORKERS = 16
+
+
+@shared_task(ignore_result=True)
 def refresh_presigned_urls():
     """Refresh presigned URLs for output files that are about to expire."""
     try:
@@ -495,28 +749,46 @@ def refresh_presigned_urls():
         output_files = OutputFile.objects.filter(
             presigned_expires_at__lt=expiring_soon,
             presigned_expires_at__gt=timezone.now()
-        )
+        ).only('id', 'file_path')
         
-        pdf_service = PDFGenerationService()
+        # One service (and thread-safe boto3 client) signs every URL
+        pdf_service = _pdf_service()
         refreshed_count = 0
         
-        for output_file in output_files:
+        def sign(output_file):
             try:
-                # Generate new presigned URL
-                new_url = pdf_service.generate_presigned_download_url(
+                return pdf_service.generate_presigned_download_url(
                     output_file.file_path,
                     expires_in=24 * 3600  # 24 hours
                 )
-                
-                # Update OutputFile
-                output_file.presigned_url = new_url
-                output_file.presigned_expires_at = timezone.now() + timedelta(hours=24)
-                output_file.save()
-                
-                refreshed_count += 1
-                
             except Exception as e:
                 logger.warning(f"Failed to refresh presigned URL for {output_file.id}: {e}")
+                return None
+        
+        def flush(batch):
+            signed = []
+            expires_at = timezone.now() + timedelta(hours=24)
+            for output_file, new_url in zip(batch, executor.map(sign, batch)):
+                if new_url is None:
+                    continue
+                output_file.presigned_url = new_url
+                output_file.presigned_expires_at = expires_at
+                signed.append(output_file)
+            if not signed:
+                return 0
+            return OutputFile.objects.bulk_update(
+                signed, ['presigned_url', 'presigned_expires_at']
+            )
+        
+        with ThreadPoolExecutor(max_workers=PRESIGNED_REFRESH_WORKERS) as executor:
+            batch = []
+            for output_file in output_files.iterator(chunk_size=1000):
+                batch.append(output_file)
+                if len(batch) >= PRESIGNED_REFRESH_BATCH_SIZE:
+                    refreshed_count += flush(batch)
+                    batch = []
+            if batch:
+                refreshed_count += flush(batch)
         
         logger.info(f"Refreshed {refreshed_count} presigned URLs")
         return {'refreshed_count': refreshed_count}
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import start_finalization, get_finalized_soap, generate_download_url, create_patient_link, list_output_files, access_patient_soap
+from .views import start_finalization, get_finalized_soap, generate_download_url, create_patient_link, bulk_create_patient_links, list_output_files, access_patient_soap
 
 app_name = 'outputs'
 
@@ -8,6 +8,7 @@ urlpatterns = [
     path('finalized/<str:encounter_id>/', get_finalized_soap, name='get-finalized'),
     path('download/<str:file_id>/', generate_download_url, name='download-report'),
     path('link-patient/', create_patient_link, name='link-patient'),
+    path('link-patient/bulk/', bulk_create_patient_links, name='link-patient-bulk'),
     path('files/<str:encounter_id>/', list_output_files, name='list-files'),
     path('access/<str:link_id>/', access_patient_soap, name='access-patient-soap'),
 ]
\ No newline at end of file
@@ -2,16 +2,22 @@
 Views for output generation and patient linking.
 """
 
+from django.db.models import F, Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from nlp.models import SOAPDraft
 from .models import FinalizedSOAP, OutputFile, PatientLink
 from .serializers import FinalizedSOAPSerializer, OutputFileSerializer, PatientLinkSerializer
-from .tasks import finalize_soap_note, create_patient_link_and_notify
+from .tasks import (
+    finalize_soap_note,
+    generate_all_outputs,
+    create_patient_links_and_notify_bulk,
+    send_patient_link_notification,
+)
 from .services.pdf_service import PDFService
 from .services.patient_linking_service import PatientLinkingService
 import logging
@@ -19,6 +25,11 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _finalized_soaps():
+    """FinalizedSOAP queryset with draft, encounter and doctor joined in."""
+    return FinalizedSOAP.objects.select_related('soap_draft__encounter__doctor')
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def start_finalization(request, encounter_id):
@@ -40,8 +51,24 @@ def start_finalization(request, encounter_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Start finalization task
-        task = finalize_soap_note.delay(soap_draft.id)
+        # Skip the worker when an up-to-date finalization already exists
+        existing = FinalizedSOAP.objects.filter(
+            soap_draft=soap_draft,
+            status__in=('finalized', 'exported'),
+            finalized_at__gte=soap_draft.updated_at
+        ).only('id', 'status').first()
+        if existing:
+            return Response({
+                'message': 'SOAP note already finalized',
+                'finalized_soap_id': existing.id,
+                'soap_draft_id': soap_draft.id,
+                'status': existing.status
+            })
+        
+        # Finalize, then generate every output format, as one Celery chain
+        task = (
+            finalize_soap_note.s(soap_draft.id) | generate_all_outputs.s()
+        ).apply_async()
         
         logger.info(f"Started SOAP finalization for encounter {encounter_id}, task: {task.id}")
         
@@ -68,7 +95,13 @@ def get_finalized_soap(request, encounter_id):
     """
     # Get finalized SOAP - get_object_or_404 handles 404 response automatically
     finalized_soap = get_object_or_404(
-        FinalizedSOAP,
+        _finalized_soaps().prefetch_related(
+            Prefetch(
+                'output_files',
+                queryset=OutputFile.objects.filter(file_type='markdown'),
+                to_attr='markdown_files'
+            )
+        ),
         soap_draft__encounter_id=encounter_id,
         soap_draft__encounter__doctor=request.user
     )
@@ -83,19 +116,16 @@ def list_output_files(request, encounter_id):
     """
     List all output files for an encounter.
     """
-    # Get finalized SOAP - get_object_or_404 handles 404 response automatically
+    # Get finalized SOAP with its output files prefetched
     finalized_soap = get_object_or_404(
-        FinalizedSOAP,
+        _finalized_soaps().prefetch_related(
+            Prefetch('output_files', queryset=OutputFile.objects.order_by('file_type'))
+        ),
         soap_draft__encounter_id=encounter_id,
         soap_draft__encounter__doctor=request.user
     )
     
-    # Get output files
-    output_files = OutputFile.objects.filter(
-        finalized_soap=finalized_soap
-    ).order_by('file_type')
-    
-    serializer = OutputFileSerializer(output_files, many=True)
+    serializer = OutputFileSerializer(finalized_soap.output_files.all(), many=True)
     
     return Response({
         'encounter_id': encounter_id,
@@ -128,7 +158,7 @@ def generate_download_url(request, file_id):
         # Update OutputFile with new presigned URL
         output_file.presigned_url = presigned_url
         output_file.presigned_expires_at = timezone.now() + timezone.timedelta(hours=1)
-        output_file.save()
+        output_file.save(update_fields=['presigned_url', 'presigned_expires_at'])
         
         return Response({
             'download_url': presigned_url,
@@ -154,7 +184,7 @@ def create_patient_link(request, encounter_id):
     try:
         # Get finalized SOAP
         finalized_soap = get_object_or_404(
-            FinalizedSOAP,
+            _finalized_soaps(),
             soap_draft__encounter_id=encounter_id,
             soap_draft__encounter__doctor=request.user
         )
@@ -172,6 +202,14 @@ def create_patient_link(request, encounter_id):
         patient_email = request.data.get('patient_email', '')
         expiry_hours = request.data.get('expiry_hours', 72)
         
+        try:
+            expiry_hours = int(expiry_hours)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'expiry_hours must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         # Validate delivery info
         if delivery_method == 'sms' and not patient_phone:
             return Response(
@@ -184,23 +222,46 @@ def create_patient_link(request, encounter_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create patient link and send notification
-        delivery_info = {
-            'method': delivery_method,
-            'phone': patient_phone,
-            'email': patient_email,
-            'expiry_hours': expiry_hours
-        }
+        # Reuse a live link for the same recipient instead of queueing a new one
+        existing_link = PatientLink.objects.filter(
+            finalized_soap=finalized_soap,
+            delivery_method=delivery_method,
+            patient_phone=patient_phone,
+            patient_email=patient_email,
+            status__in=('pending', 'sent', 'viewed'),
+            expires_at__gt=timezone.now(),
+            view_count__lt=F('max_views')
+        ).order_by('-created_at').first()
+        if existing_link:
+            return Response({
+                'message': 'Existing patient link reused',
+                'link_id': str(existing_link.link_id),
+                'access_url': existing_link.generate_access_url(),
+                'delivery_method': delivery_method,
+                'expires_at': existing_link.expires_at
+            })
         
-        task = create_patient_link_and_notify.delay(finalized_soap.id, delivery_info)
+        # Creating the link is a single insert, so do it inline and only
+        # hand the SMS/email delivery to a worker
+        patient_link = PatientLinkingService().create_patient_link(
+            finalized_soap=finalized_soap,
+            delivery_method=delivery_method,
+            patient_phone=patient_phone,
+            patient_email=patient_email,
+            custom_expiry_hours=expiry_hours
+        )
+        
+        if delivery_method in ('sms', 'email'):
+            send_patient_link_notification.delay(str(patient_link.link_id))
         
-        logger.info(f"Created patient link task for encounter {encounter_id}, task: {task.id}")
+        logger.info(f"Created patient link {patient_link.link_id} for encounter {encounter_id}")
         
         return Response({
-            'message': 'Patient link creation started',
-            'task_id': task.id,
+            'message': 'Patient link created',
+            'link_id': str(patient_link.link_id),
+            'access_url': patient_link.generate_access_url(),
             'delivery_method': delivery_method,
-            'expiry_hours': expiry_hours
+            'expires_at': patient_link.expires_at
         })
         
     except Exception as e:
@@ -211,6 +272,45 @@ def create_patient_link(request, encounter_id):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_create_patient_links(request):
+    """
+    Create patient links for many finalized SOAPs in one broker batch (admin only).
+    """
+    items = request.data.get('items')
+    if not isinstance(items, list) or not items:
+        return Response(
+            {'error': 'items must be a non-empty list'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    for item in items:
+        if not isinstance(item, dict) or 'finalized_soap_id' not in item:
+            return Response(
+                {'error': 'Each item requires finalized_soap_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    try:
+        task = create_patient_links_and_notify_bulk.delay(items)
+        
+        logger.info(f"Started bulk patient link task for {len(items)} items, task: {task.id}")
+        
+        return Response({
+            'message': 'Bulk patient link creation started',
+            'task_id': task.id,
+            'count': len(items)
+        })
+        
+    except Exception as e:
+        logger.error(f"Failed to start bulk patient link creation: {e}")
+        return Response(
+            {'error': f'Failed to create patient links: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_patient_links(request, encounter_id):
@@ -218,19 +318,19 @@ def list_patient_links(request, encounter_id):
     List patient links for an encounter.
     """
     try:
-        # Get finalized SOAP
+        # Get finalized SOAP with its patient links prefetched
         finalized_soap = get_object_or_404(
-            FinalizedSOAP,
+            _finalized_soaps().prefetch_related(
+                Prefetch(
+                    'patient_links',
+                    queryset=PatientLink.objects.select_related(None).order_by('-created_at')
+                )
+            ),
             soap_draft__encounter_id=encounter_id,
             soap_draft__encounter__doctor=request.user
         )
         
-        # Get patient links
-        patient_links = PatientLink.objects.filter(
-            finalized_soap=finalized_soap
-        ).order_by('-created_at')
-        
-        serializer = PatientLinkSerializer(patient_links, many=True)
+        serializer = PatientLinkSerializer(finalized_soap.patient_links.all(), many=True)
         
         return Response({
             'encounter_id': encounter_id,
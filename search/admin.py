@@ -44,24 +44,19 @@ class SearchableContentAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         """Optimize queryset with select_related."""
-        return super().get_queryset(request).select_related('encounter')
+        return super().get_queryset(request).select_related('encounter').defer('metadata_text')
     
     actions = ['reindex_selected']
     
     def reindex_selected(self, request, queryset):
         """Reindex selected content."""
-        from django.contrib.postgres.search import SearchVector
+        # fulltext_all is generated by MySQL; only metadata_text is derived in Python
+        contents = list(queryset.only('id', 'metadata'))
+        for content in contents:
+            content.metadata_text = SearchableContent.build_metadata_text(content.metadata)
+        SearchableContent.objects.bulk_update(contents, ['metadata_text'], batch_size=500)
         
-        count = 0
-        for content in queryset:
-            # Update search vector
-            search_vector = SearchVector('title', weight='A') + SearchVector('content', weight='B')
-            SearchableContent.objects.filter(id=content.id).update(
-                search_vector=search_vector
-            )
-            count += 1
-        
-        self.message_user(request, f"Reindexed {count} items.")
+        self.message_user(request, f"Reindexed {len(contents)} items.")
     reindex_selected.short_description = "Reindex selected content"
 
 
@@ -0,0 +1,28 @@
+# search/migrations/0003_searchquery_fulltext_mysql.py
+from django.db import migrations
+
+APP_LABEL = "search"
+TABLE = "search_searchquery"
+INDEX = "search_query_ft_idx"
+PARSER = ""  # اگر ngram دارید: ' WITH PARSER ngram'
+
+SQL_ENSURE_TABLE_OPTS = f"""
+ALTER TABLE `{TABLE}` ENGINE=InnoDB,
+  CONVERT TO CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+"""
+
+SQL_ADD_FULLTEXT = f"""
+ALTER TABLE `{TABLE}`
+    ADD FULLTEXT INDEX `{INDEX}` (`query_text`){PARSER};
+"""
+
+SQL_DROP_FULLTEXT = f"ALTER TABLE `{TABLE}` DROP INDEX `{INDEX}`;"
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (APP_LABEL, "0002_fulltext_mysql"),
+    ]
+    operations = [
+        migrations.RunSQL(sql=SQL_ENSURE_TABLE_OPTS, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=SQL_ADD_FULLTEXT, reverse_sql=SQL_DROP_FULLTEXT),
+    ]
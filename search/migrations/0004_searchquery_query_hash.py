@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 14:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_searchquery_fulltext_mysql'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchquery',
+            name='query_hash',
+            field=models.CharField(blank=True, default='', help_text='Hash of query text, filters and limits used to reuse recent results', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='searchquery',
+            index=models.Index(fields=['query_hash', 'created_at'], name='search_sear_query_h_cb1f38_idx'),
+        ),
+    ]
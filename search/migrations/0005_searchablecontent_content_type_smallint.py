@@ -0,0 +1,98 @@
+# search/migrations/0005_searchablecontent_content_type_smallint.py
+from django.db import migrations, models
+
+import search.models
+
+TABLE = "search_searchablecontent"
+CODES = {
+    "encounter": 1,
+    "transcript": 2,
+    "soap": 3,
+    "checklist": 4,
+    "notes": 5,
+}
+
+SQL_BACKFILL_CODE = (
+    f"UPDATE {TABLE} SET content_type_code = CASE content_type "
+    + " ".join(f"WHEN '{name}' THEN {code}" for name, code in CODES.items())
+    + " END;"
+)
+
+SQL_BACKFILL_NAME = (
+    f"UPDATE {TABLE} SET content_type = CASE content_type_code "
+    + " ".join(f"WHEN {code} THEN '{name}'" for name, code in CODES.items())
+    + " END;"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0004_searchquery_query_hash"),
+    ]
+
+    operations = [
+        # ایندکس‌ها و یونیک روی ستون قدیمی باید قبل از حذف آن برداشته شوند
+        migrations.RemoveConstraint(
+            model_name="searchablecontent",
+            name="uniq_search_encounter_contenttype_contentid",
+        ),
+        migrations.RemoveIndex(
+            model_name="searchablecontent",
+            name="search_sear_encount_624c78_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="searchablecontent",
+            name="search_sear_content_d8afbe_idx",
+        ),
+        migrations.AddField(
+            model_name="searchablecontent",
+            name="content_type_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        # nullable so that reversing can re-add the column before backfilling it
+        migrations.AlterField(
+            model_name="searchablecontent",
+            name="content_type",
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.RunSQL(sql=SQL_BACKFILL_CODE, reverse_sql=SQL_BACKFILL_NAME),
+        migrations.RemoveField(
+            model_name="searchablecontent",
+            name="content_type",
+        ),
+        migrations.RenameField(
+            model_name="searchablecontent",
+            old_name="content_type_code",
+            new_name="content_type",
+        ),
+        migrations.AlterField(
+            model_name="searchablecontent",
+            name="content_type",
+            field=search.models.ContentTypeField(
+                choices=[
+                    ("encounter", "Encounter"),
+                    ("transcript", "Transcript"),
+                    ("soap", "SOAP Note"),
+                    ("checklist", "Checklist"),
+                    ("notes", "Clinical Notes"),
+                ],
+                codes=CODES,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="searchablecontent",
+            index=models.Index(fields=["encounter", "content_type"], name="search_sear_encount_624c78_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="searchablecontent",
+            index=models.Index(fields=["content_type", "content_id"], name="search_sear_content_d8afbe_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="searchablecontent",
+            constraint=models.UniqueConstraint(
+                fields=("encounter", "content_type", "content_id"),
+                name="uniq_search_encounter_contenttype_contentid",
+            ),
+        ),
+    ]
@@ -8,6 +8,50 @@ import json
 from django.db import models
 
 
+class ContentTypeField(models.PositiveSmallIntegerField):
+    """
+    Content type stored as a smallint code but read and written as its name.
+
+    Keeps rows and the composite (encounter, content_type, ...) indexes
+    narrow while the ORM, filters and API keep using 'soap', 'transcript', ...
+    """
+
+    def __init__(self, *args, codes=None, **kwargs):
+        self.codes = dict(codes or {})
+        self.names = {code: name for name, code in self.codes.items()}
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["codes"] = self.codes
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.names.get(value, value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return self.names.get(value, value)
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            # نام ناشناخته با هیچ ردیفی مطابقت ندارد
+            return self.codes.get(value)
+        return super().get_prep_value(value)
+
+    def run_validators(self, value):
+        # اعتبارسنج‌های بازه (smallint، ≥0) روی کد ذخیره‌شده اجرا می‌شوند نه روی نام
+        if isinstance(value, str):
+            if value not in self.codes:
+                # نام ناشناخته را validate() به‌عنوان invalid_choice گزارش می‌کند
+                return
+            value = self.codes[value]
+        super().run_validators(value)
+
+
 class SearchableContent(models.Model):
     """Searchable content index for FULLTEXT search (MySQL)."""
 
@@ -18,13 +62,21 @@ class SearchableContent(models.Model):
         ("checklist", "Checklist"),
         ("notes", "Clinical Notes"),
     ]
+    # کد ذخیره‌شده در دیتابیس؛ هرگز مقدار موجود را تغییر ندهید
+    CONTENT_TYPE_CODES = {
+        "encounter": 1,
+        "transcript": 2,
+        "soap": 3,
+        "checklist": 4,
+        "notes": 5,
+    }
 
     encounter = models.ForeignKey(
         "encounters.Encounter",
         on_delete=models.CASCADE,
         related_name="search_content",
     )
-    content_type = models.CharField(max_length=20, choices=CONTENT_TYPE_CHOICES)
+    content_type = ContentTypeField(choices=CONTENT_TYPE_CHOICES, codes=CONTENT_TYPE_CODES)
     content_id = models.PositiveIntegerField()
     title = models.CharField(max_length=200)
     content = models.TextField()
@@ -57,12 +109,17 @@ class SearchableContent(models.Model):
     def __str__(self):
         return f"{self.content_type}:{self.content_id} - {self.title}"
 
-    def save(self, *args, **kwargs):
-        # JSON → متن برای FULLTEXT
+    @staticmethod
+    def build_metadata_text(metadata) -> str:
+        """Flatten metadata JSON into the text fed to the fulltext_all column."""
         try:
-            self.metadata_text = json.dumps(self.metadata, ensure_ascii=False, separators=(", ", ": "))
+            return json.dumps(metadata, ensure_ascii=False, separators=(", ", ": "))
         except Exception:
-            self.metadata_text = ""
+            return ""
+
+    def save(self, *args, **kwargs):
+        # JSON → متن برای FULLTEXT
+        self.metadata_text = self.build_metadata_text(self.metadata)
         super().save(*args, **kwargs)
 
 
@@ -71,6 +128,10 @@ class SearchQuery(models.Model):
 
     query_text = models.TextField()
     filters = models.JSONField(default=dict)
+    query_hash = models.CharField(
+        max_length=64, blank=True, default="",
+        help_text="Hash of query text, filters and limits used to reuse recent results",
+    )
     user = models.ForeignKey(
         "accounts.User", on_delete=models.SET_NULL, null=True, blank=True
     )
@@ -82,6 +143,7 @@ class SearchQuery(models.Model):
         indexes = [
             models.Index(fields=["user", "created_at"]),
             models.Index(fields=["created_at"]),
+            models.Index(fields=["query_hash", "created_at"]),
         ]
 
     def __str__(self):
@@ -6,15 +6,25 @@ from __future__ import annotations
 
 import time
 import math
+import re
+import functools
+from datetime import timedelta
+import hashlib
+import json
 import logging
 from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 from functools import reduce
 from operator import or_ as OR
 
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.models.expressions import RawSQL
-from django.db.models import Q
+from django.db.models import Avg, Count, Q
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
 
 from .models import SearchableContent, SearchQuery as SearchQueryModel, SearchResult
 from embeddings.models import TextEmbedding, EMBED_DIM
@@ -22,6 +32,27 @@ from embeddings.models import TextEmbedding, EMBED_DIM
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Reciprocal Rank Fusion smoothing constant
+RRF_K = 60
+
+# Characters shown in a result snippet
+SNIPPET_MAX_LENGTH = 200
+
+# Seconds a query embedding stays in the shared cache
+QUERY_EMBEDDING_CACHE_TTL = 3600
+
+# Seconds the analytics summary for a given window is cached
+SEARCH_ANALYTICS_CACHE_TTL = 300
+
+# Seconds a recorded search's results are reused for an identical search
+SEARCH_RESULT_REUSE_TTL = 300
+
+# Shorter terms fall under InnoDB's default innodb_ft_min_token_size and are never indexed
+FULLTEXT_MIN_TOKEN_SIZE = 3
+
+# Query embeddings are built here while the FULLTEXT query runs on the request thread
+_QUERY_EMBEDDING_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search-embed")
+
 
 class SearchService:
     """Thin wrapper delegating to HybridSearchService (backward-compat for tests)."""
@@ -61,45 +92,53 @@ class HybridSearchService:
             return {"results": [], "total_count": 0, "execution_time_ms": 0, "query": query_text}
 
         filters = filters or {}
+        json_filters = _json_safe_filters(filters)
+
+        # جست‌وجوی تکراری در چند دقیقهٔ اخیر: نتایج ذخیره‌شده بدون FULLTEXT و امبدینگ
+        query_hash = self._query_hash(query_text, json_filters, limit, boolean_mode, candidate_limit)
+        reused = self._recent_results(query_hash, limit)
+        if reused is not None:
+            exec_ms = int((time.time() - start_time) * 1000)
+            self._record_search(query_text, json_filters, user, exec_ms, reused)
+            return {
+                "results": reused,
+                "total_count": len(reused),
+                "execution_time_ms": exec_ms,
+                "query": query_text,
+                "filters": filters,
+            }
+
+        # امبدینگ کوئری به FULLTEXT وابسته نیست؛ هم‌زمان با آن ساخته می‌شود
+        query_vec_future = _QUERY_EMBEDDING_EXECUTOR.submit(self._get_query_embedding, query_text)
 
         # 1) FULLTEXT candidates
         fts_candidates = self._full_text_candidates(query_text, filters, candidate_limit, boolean_mode)
 
         # اگر هیچ کاندیدایی نیست، خالی برگرد
         if not fts_candidates:
+            query_vec_future.cancel()
             exec_ms = int((time.time() - start_time) * 1000)
-            sq = SearchQueryModel.objects.create(
-                query_text=query_text, filters=filters, user=user, results_count=0, execution_time_ms=exec_ms
-            )
+            self._record_search(query_text, json_filters, user, exec_ms, [], query_hash)
             return {
                 "results": [],
                 "total_count": 0,
                 "execution_time_ms": exec_ms,
                 "query": query_text,
                 "filters": filters,
-                "search_id": sq.id,
             }
 
         # 2) semantic rerank روی همین کاندیداها
-        semantic_scored = self._semantic_rerank(query_text, fts_candidates)
+        semantic_scored = self._semantic_rerank(query_text, fts_candidates, query_vec_future.result())
 
         # 3) ترکیب امتیازها
         combined_results = self._combine_results(fts_candidates, semantic_scored, limit)
+        self._attach_content(combined_results, query_text)
 
         # زمان اجرا
         execution_time_ms = int((time.time() - start_time) * 1000)
 
-        # ذخیرهٔ کوئری برای آنالیتیکس
-        search_query_obj = SearchQueryModel.objects.create(
-            query_text=query_text,
-            filters=filters,
-            user=user,
-            results_count=len(combined_results),
-            execution_time_ms=execution_time_ms,
-        )
-
-        # کش نتایج
-        self._cache_search_results(search_query_obj, combined_results)
+        # ذخیرهٔ کوئری و کش نتایج برای آنالیتیکس، خارج از مسیر درخواست
+        self._record_search(query_text, json_filters, user, execution_time_ms, combined_results, query_hash)
 
         return {
             "results": combined_results,
@@ -107,9 +146,313 @@ class HybridSearchService:
             "execution_time_ms": execution_time_ms,
             "query": query_text,
             "filters": filters,
-            "search_id": search_query_obj.id,
         }
 
+    # ---------- Analytics ----------
+    def _record_search(
+        self,
+        query_text: str,
+        filters: Dict[str, Any],
+        user: Optional[User],
+        execution_time_ms: int,
+        results: List[Dict[str, Any]],
+        query_hash: str = "",
+    ) -> None:
+        """
+        Queue the SearchQuery/SearchResult writes once the current transaction commits.
+
+        Searches served from reused results are recorded without a query_hash,
+        so they count in analytics but never extend the reuse window.
+        """
+        from .tasks import record_search
+
+        # فقط فیلدهای لازم برای SearchResult به broker فرستاده می‌شود، نه content
+        snapshot = [
+            {"id": r["id"], "combined_score": r["combined_score"], "snippet": r["snippet"]}
+            for r in results
+        ]
+        user_id = user.id if user is not None and user.is_authenticated else None
+
+        def enqueue():
+            # analytics must never fail the search itself
+            try:
+                record_search.delay(query_text, filters, user_id, execution_time_ms, snapshot, query_hash)
+            except Exception as e:
+                logger.warning(f"Failed to queue search analytics: {e}")
+
+        transaction.on_commit(enqueue)
+
+    def save_search(
+        self,
+        query_text: str,
+        filters: Dict[str, Any],
+        user_id: Optional[int],
+        execution_time_ms: int,
+        results: List[Dict[str, Any]],
+        query_hash: str = "",
+    ) -> SearchQueryModel:
+        """Persist a search and its ranked results (run by the record_search task)."""
+        # یک تراکنش تا _recent_results هرگز کوئری بدون نتایجش را نبیند
+        with transaction.atomic():
+            search_query_obj = SearchQueryModel.objects.create(
+                query_text=query_text,
+                filters=filters,
+                query_hash=query_hash,
+                user_id=user_id,
+                results_count=len(results),
+                execution_time_ms=execution_time_ms,
+            )
+            if results and query_hash:
+                self._cache_search_results(search_query_obj, results)
+        return search_query_obj
+
+    def _query_hash(
+        self,
+        query_text: str,
+        json_filters: Dict[str, Any],
+        limit: int,
+        boolean_mode: bool,
+        candidate_limit: int,
+    ) -> str:
+        """Stable hash of everything that shapes a search's results."""
+        key = json.dumps(
+            [query_text.strip(), json_filters, limit, boolean_mode, candidate_limit],
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _recent_results(self, query_hash: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Results of an identical search recorded within SEARCH_RESULT_REUSE_TTL, or None."""
+        cutoff = timezone.now() - timedelta(seconds=SEARCH_RESULT_REUSE_TTL)
+        recent = (
+            SearchQueryModel.objects.filter(query_hash=query_hash, created_at__gte=cutoff)
+            .order_by("-created_at")
+            .values_list("id", "results_count")
+            .first()
+        )
+        if recent is None:
+            return None
+        recent_id, results_count = recent
+        if not results_count:
+            return []
+
+        rows = list(
+            SearchResult.objects.filter(query_id=recent_id)
+            .select_related("content")
+            .order_by("rank")[:limit]
+        )
+        if not rows:
+            # نتایج ذخیره‌شده از آن زمان پاک شده‌اند؛ جست‌وجوی کامل
+            return None
+        return [
+            {
+                "id": row.content.id,
+                "encounter_id": row.content.encounter_id,
+                "content_type": row.content.content_type,
+                "content_id": row.content.content_id,
+                "title": row.content.title,
+                "content": row.content.content,
+                "snippet": row.snippet,
+                "score": None,  # در SearchResult ذخیره نمی‌شود
+                "semantic_similarity": None,
+                "combined_score": float(row.relevance_score),
+                "search_type": "cached",
+                "metadata": row.content.metadata or {},
+                "created_at": None,
+            }
+            for row in rows
+        ]
+
+    def get_search_analytics(self, days: int = 30) -> Dict[str, Any]:
+        """Search usage over the last ``days`` days, cached for SEARCH_ANALYTICS_CACHE_TTL."""
+        cache_key = f"search:analytics:{days}"
+        try:
+            return cache.get_or_set(
+                cache_key, lambda: self._compute_search_analytics(days), SEARCH_ANALYTICS_CACHE_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Search analytics cache unavailable: {e}")
+            return self._compute_search_analytics(days)
+
+    def _compute_search_analytics(self, days: int) -> Dict[str, Any]:
+        since = timezone.now() - timedelta(days=days)
+        queries = SearchQueryModel.objects.filter(created_at__gte=since)
+
+        totals = queries.aggregate(
+            total=Count("id"),
+            avg_time=Avg("execution_time_ms"),
+            avg_results=Avg("results_count"),
+            zero_results=Count("id", filter=Q(results_count=0)),
+        )
+
+        top_queries = list(
+            queries.values("query_text")
+                   .annotate(count=Count("id"))
+                   .order_by("-count")[:10]
+        )
+
+        # گروه‌بندی در SQL؛ در پایتون فقط روی ترکیب‌های متمایز content_type حلقه می‌زنیم
+        content_type_usage: Dict[str, int] = {}
+        grouped = queries.values("filters__content_type").annotate(count=Count("id")).order_by()
+        for row in grouped:
+            cts = row["filters__content_type"] or ["all"]
+            if isinstance(cts, str):
+                cts = [cts]
+            for ct in cts:
+                content_type_usage[ct] = content_type_usage.get(ct, 0) + row["count"]
+
+        return {
+            "period_days": days,
+            "total_searches": totals["total"],
+            "zero_result_searches": totals["zero_results"],
+            "avg_execution_time_ms": round(totals["avg_time"] or 0, 2),
+            "avg_results_count": round(totals["avg_results"] or 0, 2),
+            "top_queries": top_queries,
+            "content_type_usage": content_type_usage,
+        }
+
+    # ---------- Indexing ----------
+    def index_content(
+        self,
+        encounter_id: int,
+        content_type: str,
+        content_id: int,
+        title: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> SearchableContent:
+        """
+        Upsert one SearchableContent row.
+
+        fulltext_all is a STORED generated column (see migration 0002), so
+        MySQL refreshes it and the FULLTEXT index as part of this same write.
+        """
+        searchable, _ = SearchableContent.objects.update_or_create(
+            encounter_id=encounter_id,
+            content_type=content_type,
+            content_id=content_id,
+            defaults={
+                "title": title[:200],
+                "content": content,
+                "metadata": metadata or {},
+            },
+        )
+        return searchable
+
+    def bulk_index_content(self, items: List[SearchableContent], batch_size: int = 500) -> int:
+        """
+        Upsert many SearchableContent rows in one INSERT ... ON CONFLICT per batch.
+
+        bulk_create skips save(), so metadata_text is filled in here.
+        """
+        if not items:
+            return 0
+        for item in items:
+            item.title = item.title[:200]
+            item.metadata_text = SearchableContent.build_metadata_text(item.metadata)
+        SearchableContent.objects.bulk_create(
+            items,
+            batch_size=batch_size,
+            update_conflicts=True,
+            # MySQL upserts on any unique key and rejects an explicit target
+            unique_fields=(
+                ["encounter", "content_type", "content_id"]
+                if connection.features.supports_update_conflicts_with_target
+                else None
+            ),
+            update_fields=["title", "content", "metadata", "metadata_text", "updated_at"],
+        )
+        return len(items)
+
+    def reindex_encounter(self, encounter_id: int) -> Dict[str, int]:
+        """
+        Rebuild the search index rows of one encounter.
+
+        Transcript segments, the SOAP draft and checklist evaluations are each
+        read with one query and written back with a single bulk upsert.
+
+        Raises:
+            ValueError: if the encounter does not exist
+        """
+        from encounters.models import Encounter, TranscriptSegment
+        from nlp.models import SOAPDraft
+        from checklist.models import ChecklistEval
+
+        if not Encounter.objects.filter(id=encounter_id).exists():
+            raise ValueError(f"Encounter {encounter_id} not found")
+
+        items: List[SearchableContent] = []
+        counts = {"transcript": 0, "soap": 0, "checklist": 0}
+
+        # فقط ستون‌هایی که در ردیف ایندکس استفاده می‌شوند خوانده می‌شوند
+        segments = (
+            TranscriptSegment.objects.filter(audio_chunk__encounter_id=encounter_id)
+            .only("id", "audio_chunk_id", "segment_number", "start_time", "end_time", "text", "confidence")
+            .order_by("audio_chunk__chunk_number", "segment_number")
+        )
+        for segment in segments:
+            if len(segment.text.strip()) <= 10:
+                continue
+            items.append(SearchableContent(
+                encounter_id=encounter_id,
+                content_type="transcript",
+                content_id=segment.id,
+                title=f"Transcript segment {segment.segment_number}",
+                content=segment.text,
+                metadata={
+                    "audio_chunk_id": segment.audio_chunk_id,
+                    "start_time": segment.start_time,
+                    "end_time": segment.end_time,
+                    "confidence": segment.confidence,
+                },
+            ))
+            counts["transcript"] += 1
+
+        drafts = SOAPDraft.objects.filter(encounter_id=encounter_id).only("id", "soap_data", "status", "version")
+        for draft in drafts:
+            text = _flatten_text(draft.soap_data)
+            if not text:
+                continue
+            items.append(SearchableContent(
+                encounter_id=encounter_id,
+                content_type="soap",
+                content_id=draft.id,
+                title="SOAP Note",
+                content=text,
+                metadata={"status": draft.status, "version": draft.version},
+            ))
+            counts["soap"] += 1
+
+        evals = (
+            ChecklistEval.objects.filter(encounter_id=encounter_id)
+            .select_related("catalog_item")
+            .only(
+                "id", "status", "confidence_score", "evidence_text", "generated_question", "notes",
+                "catalog_item__title", "catalog_item__category",
+            )
+        )
+        for ev in evals:
+            text = " ".join(t for t in (ev.evidence_text, ev.generated_question, ev.notes) if t)
+            if not text:
+                continue
+            items.append(SearchableContent(
+                encounter_id=encounter_id,
+                content_type="checklist",
+                content_id=ev.id,
+                title=ev.catalog_item.title,
+                content=text,
+                metadata={
+                    "status": ev.status,
+                    "category": ev.catalog_item.category,
+                    "confidence_score": ev.confidence_score,
+                },
+            ))
+            counts["checklist"] += 1
+
+        self.bulk_index_content(items)
+        counts["total"] = len(items)
+        return counts
+
     # ---------- Internal: FULLTEXT ----------
     def _full_text_candidates(
         self,
@@ -135,15 +478,22 @@ class HybridSearchService:
             if filters.get("date_to"):
                 qs = qs.filter(created_at__lte=filters["date_to"])
 
-            mode_sql = "IN BOOLEAN MODE" if boolean_mode else "IN NATURAL LANGUAGE MODE"
-            raw = RawSQL(f"MATCH(fulltext_all) AGAINST (%s {mode_sql})", (query_text,))
+            if boolean_mode:
+                against = _websearch_to_boolean(query_text)
+                if not against:
+                    return []
+                mode_sql = "IN BOOLEAN MODE"
+            else:
+                against = query_text
+                mode_sql = "IN NATURAL LANGUAGE MODE"
+            raw = RawSQL(f"MATCH(fulltext_all) AGAINST (%s {mode_sql})", (against,))
 
+            # content خوانده نمی‌شود؛ متن و snippet فقط برای نتایج نهایی در _attach_content ساخته می‌شوند
             results = (
                 qs.annotate(relevance=raw)
                   .filter(relevance__gt=0)
-                  .only("id", "encounter_id", "content_type", "content_id", "title", "content", "metadata")
                   .order_by("-relevance", "-created_at")[:candidate_limit]
-                  .values("id", "encounter_id", "content_type", "content_id", "title", "content", "metadata", "relevance")
+                  .values("id", "encounter_id", "content_type", "content_id", "title", "metadata", "relevance")
             )
 
             # شکل استاندارد خروجی کاندیدا برای مرحلهٔ semantic
@@ -155,7 +505,6 @@ class HybridSearchService:
                     "content_type": r["content_type"],
                     "content_id": r["content_id"],
                     "title": r["title"],
-                    "content": r["content"],
                     "metadata": r["metadata"],
                     "keyword_relevance": float(r["relevance"]),
                 })
@@ -166,14 +515,20 @@ class HybridSearchService:
             return []
 
     # ---------- Internal: Semantic rerank ----------
-    def _semantic_rerank(self, query_text: str, candidates: List[Dict[str, Any]]) -> Dict[Tuple[int, str, int], float]:
+    def _semantic_rerank(
+        self,
+        query_text: str,
+        candidates: List[Dict[str, Any]],
+        query_vec: Optional[List[float]] = None,
+    ) -> Dict[Tuple[int, str, int], float]:
         """
         بر اساس امبدینگ: distance (کوچک‌تر بهتر). خروجی: map از key=(encounter_id, content_type, content_id) به distance
         """
-        # 1) ساخت امبدینگ کوئری (اینجا فرض می‌کنیم در جای دیگری ساخته می‌شود)
+        # 1) ساخت امبدینگ کوئری (اگر search آن را از قبل هم‌زمان با FULLTEXT نساخته باشد)
         # اگر سرویسی دارید که امبدینگ می‌سازد، اینجا فراخوانی کنید و بردار را بگیرید.
         # برای مستقل بودن این فایل، یک نمونهٔ ساده/جعلی می‌گذاریم که حتماً جایگزین کنید:
-        query_vec = self._make_query_embedding(query_text)
+        if query_vec is None:
+            query_vec = self._get_query_embedding(query_text)
 
         # 2) خواندن امبدینگ کاندیداها
         keys = [(c["encounter_id"], c["content_type"], c["content_id"]) for c in candidates]
@@ -181,13 +536,15 @@ class HybridSearchService:
             return {}
 
         q_or = reduce(OR, (Q(encounter_id=e, content_type=ct, content_id=cid) for e, ct, cid in keys))
-        embedding_rows = TextEmbedding.objects.filter(q_or).only(
+        # values_list: بدون ساخت شیء مدل برای هر ردیف
+        embedding_rows = TextEmbedding.objects.filter(q_or).values_list(
             "encounter_id", "content_type", "content_id", "embedding_vector"
         )
 
-        emb_map: Dict[Tuple[int, str, int], List[float]] = {}
-        for row in embedding_rows:
-            emb_map[(row.encounter_id, row.content_type, row.content_id)] = row.embedding_vector
+        emb_map: Dict[Tuple[int, str, int], List[float]] = {
+            (encounter_id, content_type, content_id): vector
+            for encounter_id, content_type, content_id, vector in embedding_rows
+        }
 
         # 3) محاسبهٔ فاصله کازاین
         distances: Dict[Tuple[int, str, int], float] = {}
@@ -206,78 +563,175 @@ class HybridSearchService:
         limit: int,
     ) -> List[Dict[str, Any]]:
         """
-        ترکیب: similarity_sem = 1 - distance (clamped to [0,1])، سپس
-        combined = w_ft * norm(keyword_relevance) + w_sem * similarity_sem
+        Reciprocal Rank Fusion:
+        combined = w_ft / (k + rank_ft) + w_sem / (k + rank_sem)
+
+        Only each list's rank order is used, so MATCH relevance and cosine
+        distance never need to be brought onto a common scale. A candidate
+        without an embedding gets no semantic term. k=60 is the usual RRF default.
         """
-        # نرمال‌سازی سادهٔ امتیاز FULLTEXT بین 0..1
-        if fts_candidates:
-            max_kw = max(c["keyword_relevance"] for c in fts_candidates) or 1.0
+        k = RRF_K
+
+        # بدون امبدینگ، ترتیب RRF همان ترتیب FULLTEXT است؛ فقط limit نتیجهٔ اول ساخته می‌شود
+        if not semantic_dist:
+            return [
+                self._format_result(c, self.fts_weight / (k + fts_rank), None)
+                for fts_rank, c in enumerate(fts_candidates[:limit], 1)
+            ]
+
+        # امتیازها به‌صورت آرایه‌ای روی همهٔ کاندیداها (ترتیب FULLTEXT = رتبهٔ FULLTEXT)
+        n = len(fts_candidates)
+        dists = np.fromiter(
+            (semantic_dist.get((c["encounter_id"], c["content_type"], c["content_id"]), np.nan)
+             for c in fts_candidates),
+            dtype=np.float64, count=n,
+        )
+        fts_rank = np.arange(1, n + 1)
+        combined = self.fts_weight / (k + fts_rank)
+
+        # رتبهٔ semantic: فاصلهٔ کمتر = رتبهٔ بهتر (1-based)
+        with_sem = np.flatnonzero(~np.isnan(dists))
+        by_dist = with_sem[np.argsort(dists[with_sem], kind="stable")]
+        combined[by_dist] += self.semantic_weight / (k + np.arange(1, len(by_dist) + 1))
+
+        # argpartition برندگان را در O(n) جدا می‌کند؛ فقط همان limit مرتب می‌شوند
+        top = np.argpartition(-combined, limit - 1)[:limit] if limit < n else fts_rank - 1
+        top = top[np.lexsort((top, -combined[top]))]
+
+        # دیکشنری نتیجه فقط برای limit برندهٔ نهایی ساخته می‌شود
+        return [
+            self._format_result(
+                fts_candidates[i],
+                float(combined[i]),
+                None if np.isnan(dists[i]) else float(dists[i]),
+            )
+            for i in top
+        ]
+
+    def _format_result(self, c: Dict[str, Any], combined: float, dist: Optional[float]) -> Dict[str, Any]:
+        """Shape one FULLTEXT candidate into the public result dict."""
+        if dist is None:
+            # اگر امبدینگی نیافتیم، فقط FULLTEXT را لحاظ می‌کنیم
+            sem_sim = 0.0
         else:
-            max_kw = 1.0
-
-        results = []
-        for c in fts_candidates:
-            key = (c["encounter_id"], c["content_type"], c["content_id"])
-            dist = semantic_dist.get(key)
-            if dist is None:
-                # اگر امبدینگی نیافتیم، فقط FULLTEXT را لحاظ می‌کنیم
-                sem_sim = 0.0
-            else:
-                sem_sim = max(0.0, min(1.0, 1.0 - float(dist)))  # 1 - distance
-
-            kw_norm = float(c["keyword_relevance"]) / max_kw
-            combined = kw_norm * self.fts_weight + sem_sim * self.semantic_weight
-
-            results.append({
-                "id": c["id"],
-                "encounter_id": c["encounter_id"],
-                "content_type": c["content_type"],
-                "content_id": c["content_id"],
-                "title": c["title"],
-                "content": c["content"],
-                "snippet": self._generate_snippet(c["content"], ""),  # می‌تونی query_text پاس بدی برای هایلایت
-                "score": float(kw_norm),                # امتیاز raw کیورد
-                "semantic_similarity": float(sem_sim),  # شباهت 0..1
-                "combined_score": float(combined),
-                "search_type": "hybrid" if dist is not None else "full_text",
-                "metadata": c.get("metadata") or {},
-                "created_at": None,  # اختیاری
-            })
-
-        results.sort(key=lambda x: x["combined_score"], reverse=True)
-        return results[:limit]
+            sem_sim = max(0.0, min(1.0, 1.0 - float(dist)))  # 1 - distance
+        return {
+            "id": c["id"],
+            "encounter_id": c["encounter_id"],
+            "content_type": c["content_type"],
+            "content_id": c["content_id"],
+            "title": c["title"],
+            "content": None,  # توسط _attach_content پر می‌شود
+            "snippet": "",  # توسط _attach_content پر می‌شود
+            "score": float(c["keyword_relevance"]),  # امتیاز raw کیورد
+            "semantic_similarity": float(sem_sim),  # شباهت 0..1
+            "combined_score": float(combined),
+            "search_type": "hybrid" if dist is not None else "full_text",
+            "metadata": c.get("metadata") or {},
+            "created_at": None,  # اختیاری
+        }
 
     # ---------- Helpers ----------
-    def _generate_snippet(self, content: str, query_text: str, max_length: int = 200) -> str:
+    def _attach_content(self, results: List[Dict[str, Any]], query_text: str = "") -> None:
+        """Load full content for the final results only, in one query, and build their snippets."""
+        if not results:
+            return
+        contents = dict(
+            SearchableContent.objects.filter(id__in=[r["id"] for r in results]).values_list("id", "content")
+        )
+        for r in results:
+            r["content"] = contents.get(r["id"], "")
+            r["snippet"] = self._generate_snippet(r["content"], query_text)
+
+    def _generate_snippet(self, content: str, query_text: str, max_length: int = SNIPPET_MAX_LENGTH) -> str:
+        """
+        Return the max_length window of content holding the most query-term hits.
+
+        One compiled-regex pass collects hit offsets; a two-pointer sweep then
+        finds the densest window. Without hits this falls back to the prefix.
+        """
         if not content:
             return ""
-        # ساده: ابتدای متن را برمی‌گردانیم؛ می‌توانی مثل قبل sliding-window با هایلایت کلمات بسازی
-        snippet = content[:max_length]
-        if len(content) > max_length:
+        if len(content) <= max_length:
+            return content
+
+        start = 0
+        pattern = _query_term_pattern(query_text)
+        if pattern is not None:
+            offsets = [m.start() for m in pattern.finditer(content)]
+            best_count, left = 0, 0
+            for right, offset in enumerate(offsets):
+                while offset - offsets[left] >= max_length:
+                    left += 1
+                if right - left + 1 > best_count:
+                    best_count, start = right - left + 1, offsets[left]
+            start = min(start, len(content) - max_length)
+
+        end = start + max_length
+        snippet = content[start:end]
+        if start > 0:
+            snippet = "..." + snippet
+        if end < len(content):
             snippet += "..."
         return snippet
 
     def _cache_search_results(self, search_query_obj: SearchQueryModel, results: List[Dict[str, Any]]):
+        """
+        Store ranked results for a search in one INSERT, with no prior DELETE.
+
+        Rows are upserted on (query, content), so caching results again for
+        the same query rewrites them in place instead of failing.
+        """
         try:
-            SearchResult.objects.filter(query=search_query_obj).delete()
+            # one id lookup skips rows deleted since the FULLTEXT query ran
+            existing_ids = set(
+                SearchableContent.objects.filter(id__in=[r["id"] for r in results])
+                .values_list("id", flat=True)
+            )
             bulk = []
             for rank, r in enumerate(results, 1):
-                try:
-                    sc = SearchableContent.objects.get(id=r["id"])
-                except SearchableContent.DoesNotExist:
+                if r["id"] not in existing_ids:
                     continue
                 bulk.append(SearchResult(
                     query=search_query_obj,
-                    content=sc,
+                    content_id=r["id"],
                     relevance_score=r["combined_score"],
                     rank=rank,
                     snippet=r["snippet"],
                 ))
             if bulk:
-                SearchResult.objects.bulk_create(bulk)
+                SearchResult.objects.bulk_create(
+                    bulk,
+                    update_conflicts=True,
+                    # MySQL upserts on any unique key and rejects an explicit target
+                    unique_fields=(
+                        ["query", "content"]
+                        if connection.features.supports_update_conflicts_with_target
+                        else None
+                    ),
+                    update_fields=["relevance_score", "rank", "snippet"],
+                )
         except Exception as e:
             logger.error(f"Failed to cache search results: {e}")
 
+    def _get_query_embedding(self, query_text: str) -> List[float]:
+        """Query embedding through the shared cache, so repeated searches skip the model."""
+        cache_key = f"search:qemb:{EMBED_DIM}:{hashlib.sha1(query_text.encode('utf-8')).hexdigest()}"
+        try:
+            cached = cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Query embedding cache unavailable: {e}")
+            return self._make_query_embedding(query_text)
+        if cached is not None:
+            return cached
+
+        query_vec = self._make_query_embedding(query_text)
+        try:
+            cache.set(cache_key, query_vec, timeout=QUERY_EMBEDDING_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Failed to cache query embedding: {e}")
+        return query_vec
+
     # ---- Fake/simple embedding for query (جایگزین با سرویس واقعی) ----
     def _make_query_embedding(self, text: str) -> List[float]:
         """
@@ -285,13 +739,112 @@ class HybridSearchService:
         فعلاً بردار واحد با hashing ساده تولید می‌کند تا روند کامل باشد.
         """
         import random
-        random.seed(hash(text) & 0xFFFFFFFF)
-        vec = [random.random() for _ in range(EMBED_DIM)]
+        # نمونهٔ محلی؛ این تابع روی thread pool اجرا می‌شود و seed سراسری امن نیست
+        rng = random.Random(hash(text) & 0xFFFFFFFF)
+        vec = [rng.random() for _ in range(EMBED_DIM)]
         # unit normalize
         s = math.sqrt(sum(x*x for x in vec)) or 1.0
         return [x / s for x in vec]
 
 
+@functools.lru_cache(maxsize=256)
+def _query_term_pattern(query_text: str) -> Optional["re.Pattern[str]"]:
+    """
+    Case-insensitive alternation of the query terms (boolean-mode operators stripped).
+
+    Cached per query text and matched with IGNORECASE, so building the
+    snippets for a page of results never copies their content to lowercase.
+    """
+    terms = sorted({t for t in re.findall(r"\w+", (query_text or "").lower()) if len(t) > 1}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+
+
+# A quoted phrase (optionally negated) or a bare token
+_WEBSEARCH_TOKEN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+
+@functools.lru_cache(maxsize=256)
+def _websearch_to_boolean(query_text: str) -> str:
+    """
+    Translate web-search syntax into a MySQL BOOLEAN MODE expression.
+
+    Mirrors PostgreSQL's websearch_to_tsquery: terms are ANDed ("+term"),
+    "quoted text" is a phrase, a leading "-" excludes and "or" between two
+    terms makes both optional. Stray operator characters are dropped so
+    user input can never produce a boolean-mode syntax error. Terms below
+    FULLTEXT_MIN_TOKEN_SIZE are kept optional, since InnoDB never indexes
+    them and requiring one would match nothing.
+    """
+    parts: List[List[str]] = []  # [operator, term]
+    or_pending = False
+    for m in _WEBSEARCH_TOKEN.finditer(query_text or ""):
+        negate, phrase, token = m.group(1), m.group(2), m.group(3)
+        if token is not None and token.lower() == "or":
+            if parts and parts[-1][0] == "+":
+                parts[-1][0] = ""
+                or_pending = True
+            continue
+        if phrase is not None:
+            words = re.findall(r"\w+", phrase)
+            terms = ['"' + " ".join(words) + '"'] if words else []
+        else:
+            negate = "-" if token.startswith("-") else ""
+            terms = re.findall(r"\w+", token)
+        for term in terms:
+            if negate:
+                op = "-"
+            elif or_pending or (not term.startswith('"') and len(term) < FULLTEXT_MIN_TOKEN_SIZE):
+                op = ""
+            else:
+                op = "+"
+            parts.append([op, term])
+            or_pending = False
+
+    if not any(op != "-" for op, _ in parts):
+        # Only exclusions (or nothing) left: MySQL would match no rows
+        return ""
+    return " ".join(op + term for op, term in parts)
+
+
+def fulltext_prefix_query(query_prefix: str) -> str:
+    """
+    BOOLEAN MODE expression for a typed prefix: every word, the last one as a prefix.
+
+    Same rule as _websearch_to_boolean: only words of at least
+    FULLTEXT_MIN_TOKEN_SIZE are required, shorter ones stay optional. Returns
+    "" when no word is long enough to be indexed, so callers can fall back to
+    a LIKE match.
+    """
+    terms = re.findall(r"\w+", query_prefix or "")
+    if not any(len(term) >= FULLTEXT_MIN_TOKEN_SIZE for term in terms):
+        return ""
+    parts = [("+" if len(term) >= FULLTEXT_MIN_TOKEN_SIZE else "") + term for term in terms]
+    return " ".join(parts) + "*"
+
+
+def _json_safe_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Filters with dates as ISO strings, as stored on SearchQuery and hashed for reuse."""
+    return {
+        key: value.isoformat() if hasattr(value, "isoformat") else value
+        for key, value in filters.items()
+    }
+
+
+def _flatten_text(value: Any) -> str:
+    """Join every string leaf of a nested SOAP JSON structure into one text blob."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        parts = (_flatten_text(v) for v in value.values())
+    elif isinstance(value, (list, tuple)):
+        parts = (_flatten_text(v) for v in value)
+    else:
+        return ""
+    return " ".join(p for p in parts if p)
+
+
 def _cosine_distance(a: List[float], b: List[float]) -> float:
     dot = 0.0
     na = 0.0
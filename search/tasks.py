@@ -0,0 +1,30 @@
+"""
+Celery tasks for search.
+"""
+import logging
+from celery import shared_task
+
+from .services import HybridSearchService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def record_search(query_text, filters, user_id, execution_time_ms, results, query_hash=''):
+    """
+    Store a search query and its ranked results for analytics.
+    
+    Args:
+        query_text: Raw query string
+        filters: JSON-safe filters the search ran with
+        user_id: ID of the searching user, if any
+        execution_time_ms: Time the search took
+        results: List of dicts with 'id', 'combined_score' and 'snippet'
+        query_hash: Reuse key for the results; empty for reused results
+    """
+    try:
+        HybridSearchService().save_search(
+            query_text, filters, user_id, execution_time_ms, results, query_hash
+        )
+    except Exception as e:
+        logger.error(f"Failed to record search '{query_text[:50]}': {str(e)}")
@@ -6,9 +6,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models.expressions import RawSQL
 from django.utils.dateparse import parse_date
 
-from .services import HybridSearchService
+from .services import HybridSearchService, fulltext_prefix_query
 
 
 @api_view(['GET'])
@@ -109,8 +111,7 @@ def search_content(request):
             'has_next': page_obj.has_next(),
             'has_previous': page_obj.has_previous()
         },
-        'execution_time_ms': search_results['execution_time_ms'],
-        'search_id': search_results['search_id']
+        'execution_time_ms': search_results['execution_time_ms']
     })
 
 
@@ -137,10 +138,20 @@ def search_suggestions(request):
     # Get suggestions from recent searches
     from .models import SearchQuery as SearchQueryModel
     
-    suggestions = SearchQueryModel.objects.filter(
-        query_text__icontains=query_prefix,
+    queries = SearchQueryModel.objects.filter(
         results_count__gt=0  # Only suggest queries that returned results
-    ).values('query_text').distinct().order_by('-id')[:limit]
+    )
+    
+    boolean_query = fulltext_prefix_query(query_prefix) if connection.vendor == 'mysql' else ''
+    if boolean_query:
+        # Word-prefix match served by the FULLTEXT index on query_text (migration 0003)
+        queries = queries.annotate(
+            match=RawSQL('MATCH(query_text) AGAINST (%s IN BOOLEAN MODE)', (boolean_query,))
+        ).filter(match__gt=0)
+    else:
+        queries = queries.filter(query_text__icontains=query_prefix)
+    
+    suggestions = queries.values('query_text').distinct().order_by('-id')[:limit]
     
     suggestion_list = [s['query_text'] for s in suggestions]
     
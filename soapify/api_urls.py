@@ -0,0 +1,46 @@
+"""
+همه‌ی مسیرهای API زیر یک پیشوند `api/`.
+
+soapify.urls فقط یک شاخه‌ی `api/` دارد؛ resolver برای healthz/admin/swagger
+به‌جای پیمودن تک‌تک includeهای اپ‌ها، یک پیشوند را چک می‌کند.
+app_name عمداً تعریف نشده تا نام‌های reverse (مثل token_obtain_pair و stt:...) تغییر نکنند.
+"""
+from django.urls import path, include
+
+from rest_framework import routers
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
+
+# در صورت نیاز به Router (فعلاً خالی)
+router = routers.DefaultRouter()
+# مثال:
+# from accounts.views import UserViewSet
+# router.register(r'users', UserViewSet, basename='user')
+
+urlpatterns = [
+    # Auth (JWT) با Scoped throttling
+    path('auth/token/',
+         TokenObtainPairView.as_view(),
+         name='token_obtain_pair'),
+    path('auth/token/refresh/',
+         TokenRefreshView.as_view(),
+         name='token_refresh'),
+    path('auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+
+    # Router base
+    path('', include(router.urls)),
+
+    # Core apps
+    path('', include('accounts.urls')),
+    path('', include('encounters.urls')),
+    path('stt/', include('stt.urls')),
+    path('nlp/', include('nlp.urls')),
+    path('outputs/', include('outputs.urls')),
+    path('integrations/', include('integrations.urls')),
+    path('uploads/', include('uploads.urls')),
+
+    # New modules
+    path('checklist/', include('checklist.urls')),
+    path('embeddings/', include('embeddings.urls')),
+    path('search/', include('search.urls')),
+    path('analytics/', include('analytics.urls')),
+]
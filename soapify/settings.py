@@ -1,6 +1,7 @@
 import os
+import re
 from pathlib import Path
-from dotenv import load_dotenv, find_dotenv
+from dotenv import load_dotenv
 import ssl
 from datetime import timedelta
 
@@ -8,7 +9,18 @@ from datetime import timedelta
 # Base & Env
 # -----------------------
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(find_dotenv())
+# در production متغیرها را ارکستریتور تزریق می‌کند؛ .env فقط برای توسعه، از مسیرهای ثابت و بدون جستجوی پوشه‌های والد
+# soapify/.env (کنار همین فایل) اولویت دارد؛ load_dotenv مقادیر موجود را بازنویسی نمی‌کند
+if os.getenv('DJANGO_ENV') != 'production':
+    for _env_file in (Path(__file__).resolve().parent / '.env', BASE_DIR / '.env'):
+        if _env_file.is_file():
+            load_dotenv(_env_file)
+
+
+def _env_csv(name, default=''):
+    """Comma-separated env var as a tuple, with empty entries dropped."""
+    return tuple(item for item in os.getenv(name, default).split(',') if item)
+
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-dev-key-change-in-production')
 DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
@@ -24,13 +36,6 @@ CORS_ALLOWED_ORIGINS = [
     'https://django-m.chbk.app',
 ]
 
-CORS_ALLOW_HEADERS = [
-    'authorization',
-    'content-type',
-    'x-csrftoken',
-    'accept'
-]
-
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:8000",
     "http://127.0.0.1:8000",
@@ -41,14 +46,13 @@ CSRF_TRUSTED_ORIGINS = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
-ROOT_URLCONF = 'medogram.urls'
 
 
 
 # -----------------------
 # Apps
 # -----------------------then
-INSTALLED_APPS = [
+INSTALLED_APPS = (
     # Django
     'django.contrib.admin',
     'django.contrib.auth',
@@ -81,32 +85,35 @@ INSTALLED_APPS = [
     'analytics',
     'infra',
     'worker',
-]
+)
 
 # -----------------------
 # Middleware
 # -----------------------
-MIDDLEWARE = [
+# CsrfViewMiddleware عمداً حذف شده: API فقط JWT است (DRF خودش csrf_exempt است)
+# و ویوهای ادمین جنگو خودشان با csrf_protect محافظت می‌شوند
+MIDDLEWARE = (
     "django.middleware.security.SecurityMiddleware",
+    # باید بالای هر میدلوری باشد که بدنه‌ی پاسخ را می‌خواند/تغییر می‌دهد
+    "infra.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "infra.middleware.HMACMiddleware",
     "infra.middleware.RateLimitMiddleware",
     "infra.middleware.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "infra.middleware.csrf_exempt.CSRFFreeAPIMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-]
+)
 
 ROOT_URLCONF = 'soapify.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates'],  # در صورت نیاز
+        # فقط اگر پوشه وجود داشته باشد؛ وگرنه loader برای هر رندر بیهوده دنبالش می‌گردد
+        'DIRS': [BASE_DIR / 'templates'] if (BASE_DIR / 'templates').is_dir() else [],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -118,6 +125,31 @@ TEMPLATES = [
     },
 ]
 
+# -----------------------
+# App profile
+# -----------------------
+# APP_PROFILE=api: ورکر فقط‌API بدون ادمین/سشن/messages/staticfiles؛ ادمین روی دیپلوی جداگانه (full) اجرا می‌شود
+APP_PROFILE = os.getenv('APP_PROFILE', 'full')
+
+if APP_PROFILE == 'api':
+    _ADMIN_ONLY_APPS = (
+        'django.contrib.admin',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'django.contrib.staticfiles',
+    )
+    # احراز هویت API با JWT در DRF انجام می‌شود؛ AuthenticationMiddleware بدون سشن کار نمی‌کند
+    _ADMIN_ONLY_MIDDLEWARE = (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+    )
+    INSTALLED_APPS = tuple(app for app in INSTALLED_APPS if app not in _ADMIN_ONLY_APPS)
+    MIDDLEWARE = tuple(mw for mw in MIDDLEWARE if mw not in _ADMIN_ONLY_MIDDLEWARE)
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove(
+        'django.contrib.messages.context_processors.messages'
+    )
+
 WSGI_APPLICATION = 'soapify.wsgi.application'
 ASGI_APPLICATION = 'soapify.asgi.application'
 
@@ -133,6 +165,10 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', ''),
+        # اتصال هر worker تا این مدت (ثانیه) بازاستفاده می‌شود؛ 0 = اتصال جدید برای هر درخواست
+        # در gunicorn با gevent/thread زیاد، کم نگه دارید تا تعداد اتصال‌ها محدود بماند
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -183,9 +219,9 @@ REST_FRAMEWORK = {
 
     # Throttling (Anon/User + Scoped)
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.ScopedRateThrottle',
+        'infra.throttling.AnonRateThrottle',
+        'infra.throttling.UserRateThrottle',
+        'infra.throttling.ScopedRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
@@ -204,12 +240,15 @@ REST_FRAMEWORK = {
 # SimpleJWT
 # -----------------------
 LOCAL_JWT_SECRET = os.getenv('LOCAL_JWT_SECRET')  # در صورت نبود، از SECRET_KEY استفاده می‌شود
+# کلید HMAC یک‌بار به bytes تبدیل می‌شود؛ SimpleJWT یک TokenBackend سراسری با همین مقدار می‌سازد
+# و PyJWT دیگر برای هر توکن آن را encode نمی‌کند
+SIMPLE_JWT_SIGNING_KEY = (LOCAL_JWT_SECRET or SECRET_KEY).encode('utf-8')
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=2),  # 2 days for access token
     'REFRESH_TOKEN_LIFETIME': timedelta(days=10),  # 10 days for refresh token
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'SIGNING_KEY': LOCAL_JWT_SECRET or SECRET_KEY,
+    'SIGNING_KEY': SIMPLE_JWT_SIGNING_KEY,
     'ALGORITHM': 'HS256',
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
@@ -221,10 +260,10 @@ SIMPLE_JWT = {
 # CORS / Security Headers
 # -----------------------
 CORS_ALLOW_ALL_ORIGINS = os.getenv('CORS_ALLOW_ALL_ORIGINS', 'True').lower() == 'true'
-CORS_ALLOWED_ORIGINS = [o for o in os.getenv('CORS_ALLOWED_ORIGINS', '').split(',') if o]
-CORS_ALLOW_HEADERS = list(set((
+CORS_ALLOWED_ORIGINS = _env_csv('CORS_ALLOWED_ORIGINS')
+CORS_ALLOW_HEADERS = (
     'authorization', 'content-type', 'x-signature', 'x-timestamp', 'x-nonce'
-)))
+)
 CORS_ALLOW_CREDENTIALS = os.getenv('CORS_ALLOW_CREDENTIALS', 'False').lower() == 'true'
 
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -274,11 +313,15 @@ CACHES = {
         "LOCATION": REDIS_URL_CACHE,
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # redis-py پاسخ‌ها را با hiredis (C) پارس می‌کند اگر نصب باشد (requirements.txt)
             "SOCKET_CONNECT_TIMEOUT": 5,
             "SOCKET_TIMEOUT": 5,
             "HEALTH_CHECK_INTERVAL": 30,
+            # وقتی هر 100 اتصال مشغول‌اند، تا 5 ثانیه منتظر می‌ماند به‌جای خطای Too many connections
+            "CONNECTION_POOL_CLASS": "redis.BlockingConnectionPool",
             "CONNECTION_POOL_KWARGS": {
                 "max_connections": 100,
+                "timeout": 5,
                 "retry_on_timeout": True,
             },
             # اگر TLS لازم است
@@ -286,12 +329,16 @@ CACHES = {
         },
         "TIMEOUT": CACHE_TIMEOUT,  # None=بدون انقضا؛ توصیه: مقدار معقول (مثلاً 300 ثانیه)
         "KEY_PREFIX": "soapify",   # مطابق نام پروژه تنظیم شود
+        # چیدمان کلید <prefix>:<version>:<key>؛ همان قالب پیش‌فرض جنگو، در infra/cache.py مستند شده
+        "KEY_FUNCTION": "infra.cache.make_key",
+        "REVERSE_KEY_FUNCTION": "infra.cache.reverse_key",
     }
 }
 
-# (اختیاری) ذخیره‌ی سشن‌ها روی کش
-# SESSION_ENGINE = "django.contrib.sessions.backends.cache"
-# SESSION_CACHE_ALIAS = "default"
+# سشن‌ها (فقط ادمین؛ API با JWT است و سشن را lazy هرگز بارگذاری نمی‌کند):
+# خواندن از Redis، در صورت evict شدن از دیتابیس؛ خروج ناخواسته کاربر رخ نمی‌دهد
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "default"
 
 # -----------------------
 # Celery
@@ -352,10 +399,9 @@ OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.gapgpt.app/v1')
 # HMAC
 # -----------------------
 HMAC_SHARED_SECRET = os.getenv('HMAC_SHARED_SECRET')
-HMAC_ENFORCE_PATHS = os.getenv(
-    'HMAC_ENFORCE_PATHS',
-    '^/api/integrations/.*$,^/api/crazy/.*$'
-).split(',')
+HMAC_ENFORCE_PATHS = _env_csv('HMAC_ENFORCE_PATHS', '^/api/integrations/.*$,^/api/crazy/.*$')
+# یک‌بار در بارگذاری تنظیمات کامپایل می‌شوند؛ میدلورها فقط Pattern ها را match می‌کنند
+HMAC_ENFORCE_REGEXES = tuple(re.compile(p) for p in HMAC_ENFORCE_PATHS)
 
 # -----------------------
 # Helssa / CrazyMiner (اختیاری)
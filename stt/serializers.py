@@ -19,8 +19,28 @@ class TranscriptionStatusSerializer(serializers.Serializer):
     result = serializers.JSONField(required=False, allow_null=True)
 
 
+class SegmentDurationField(serializers.FloatField):
+    """
+    Segment duration in seconds.
+
+    List views annotate `duration` in SQL (see stt.views.segments_with_duration);
+    instances loaded without the annotation fall back to computing it here.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if hasattr(instance, 'duration'):
+            return instance.duration
+        if instance.start_time is not None and instance.end_time is not None:
+            return round(instance.end_time - instance.start_time, 2)
+        return None
+
+
 class TranscriptSegmentSerializer(serializers.ModelSerializer):
-    duration = serializers.SerializerMethodField()
+    duration = SegmentDurationField()
     
     class Meta:
         model = TranscriptSegment
@@ -28,12 +48,6 @@ class TranscriptSegmentSerializer(serializers.ModelSerializer):
             'id', 'segment_number', 'start_time', 'end_time',
             'text', 'confidence', 'created_at', 'duration'
         ]
-    
-    def get_duration(self, obj):
-        """Calculate segment duration in seconds."""
-        if obj.start_time is not None and obj.end_time is not None:
-            return round(obj.end_time - obj.start_time, 2)
-        return None
 
 
 class TranscriptSegmentUpdateSerializer(serializers.ModelSerializer):
@@ -43,10 +57,11 @@ class TranscriptSegmentUpdateSerializer(serializers.ModelSerializer):
         
     def validate_text(self, value):
         """Validate transcript text."""
-        if not value or not value.strip():
+        text = value.strip() if value else ''
+        if not text:
             raise serializers.ValidationError("Text cannot be empty")
         
-        if len(value.strip()) > 5000:
+        if len(text) > 5000:
             raise serializers.ValidationError("Text is too long (max 5000 characters)")
         
-        return value.strip()
+        return text
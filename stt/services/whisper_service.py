@@ -5,9 +5,10 @@ Whisper STT service using GapGPT API.
 import os
 import logging
 import requests
+from functools import cached_property
 from typing import Dict, List, Optional
 from django.conf import settings
-from openai import OpenAI
+from integrations.clients.openai_client import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +17,19 @@ class WhisperService:
     """Service for converting audio to text using Whisper-1 via GapGPT."""
     
     def __init__(self):
-        # For tests, allow initialization without API key
-        api_key = settings.OPENAI_API_KEY or "test-key"
-        base_url = settings.OPENAI_BASE_URL or "https://api.openai.com/v1"
-        
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url=base_url
-        )
         self.max_file_size = 25 * 1024 * 1024  # 25MB
         self.supported_formats = ['wav', 'mp3', 'm4a', 'flac', 'ogg']
         self.max_retries = 3
         self.timeout = 300  # 5 minutes
+
+    @cached_property
+    def client(self):
+        """OpenAI client, built on first API call and shared across instances."""
+        # For tests, allow initialization without API key
+        return get_openai_client(
+            settings.OPENAI_API_KEY or "test-key",
+            settings.OPENAI_BASE_URL or "https://api.openai.com/v1",
+        )
     
     def transcribe_audio(
         self, 
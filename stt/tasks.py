@@ -5,23 +5,30 @@ Celery tasks for STT processing.
 import os
 import boto3
 import tempfile
-from celery import shared_task
+from celery import group, shared_task
 from django.conf import settings
 from django.utils import timezone
 from encounters.models import AudioChunk, TranscriptSegment
+from uploads.s3 import get_bucket_name, get_s3_client
 from .services.whisper_service import WhisperService
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def release_claimed_chunks(audio_chunk_ids):
+    """Put claimed chunks back to 'committed' when their task could not be queued."""
+    AudioChunk.objects.filter(id__in=audio_chunk_ids, status='processing').update(status='committed')
+
+
 @shared_task(bind=True, max_retries=3)
-def process_audio_stt(self, audio_chunk_id: int):
+def process_audio_stt(self, audio_chunk_id: int, claimed: bool = False):
     """
     Process committed audio chunk for STT transcription.
     
     Args:
         audio_chunk_id: ID of the AudioChunk to process
+        claimed: The caller already moved the chunk to 'processing' (bulk_transcribe)
         
     Returns:
         Dict with processing results
@@ -35,7 +42,7 @@ def process_audio_stt(self, audio_chunk_id: int):
             return {'error': 'AudioChunk not found'}
         
         # Check if already processing or processed
-        if audio_chunk.status in ['processing', 'processed']:
+        if audio_chunk.status == 'processed' or (audio_chunk.status == 'processing' and not claimed):
             logger.info(f"AudioChunk {audio_chunk_id} already {audio_chunk.status}")
             return {'status': audio_chunk.status}
         
@@ -151,6 +158,47 @@ def process_audio_stt(self, audio_chunk_id: int):
         return {'error': str(e)}
 
 
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def process_uploaded_audio(self, object_key: str, filename: str, language: str = None):
+    """
+    Transcribe an audio file uploaded through upload_and_transcribe.
+    
+    Args:
+        object_key: S3 key the view stored the upload under
+        filename: Original filename (used for the format suffix)
+        language: Language code (optional)
+        
+    Returns:
+        Dict with the WhisperService transcription result
+    """
+    s3_client = get_s3_client()
+    suffix = os.path.splitext(filename)[1]
+    temp_file_path = None
+    try:
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+            temp_file_path = temp_file.name
+            s3_client.download_fileobj(get_bucket_name(), object_key, temp_file)
+        
+        result = WhisperService().transcribe_audio(temp_file_path, language=language)
+    except Exception as e:
+        logger.error(f"Transcription of uploaded audio {object_key} failed: {str(e)}")
+        
+        # Retry with exponential backoff
+        if self.request.retries < self.max_retries:
+            retry_delay = 2 ** self.request.retries * 60  # 1min, 2min, 4min
+            raise self.retry(countdown=retry_delay, exc=e)
+        
+        s3_client.delete_object(Bucket=get_bucket_name(), Key=object_key)
+        return {'error': str(e)}
+    finally:
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.unlink(temp_file_path)
+    
+    # The upload is only kept until it has been transcribed
+    s3_client.delete_object(Bucket=get_bucket_name(), Key=object_key)
+    return result
+
+
 @shared_task
 def process_encounter_audio(encounter_id: int):
     """
@@ -219,12 +267,26 @@ def cleanup_temp_files():
 
 @shared_task
 def process_bulk_transcription(audio_chunk_ids: list):
-    """Process multiple audio chunks for transcription (used by tests)."""
-    results = []
-    for chunk_id in audio_chunk_ids:
-        try:
-            result = process_audio_stt.apply(args=(chunk_id,)).get()
-            results.append({'chunk_id': chunk_id, 'result': result})
-        except Exception as exc:
-            results.append({'chunk_id': chunk_id, 'error': str(exc)})
-    return {'processed': len(results), 'results': results}
+    """
+    Queue STT processing for multiple audio chunks, in parallel across workers.
+    
+    The chunks are expected to have been claimed (set to 'processing') by bulk_transcribe.
+    Returns right after dispatch instead of waiting on the subtasks, so no worker slot is
+    held; poll the returned task ids for the per-chunk results.
+    """
+    try:
+        job = group(
+            process_audio_stt.s(chunk_id, claimed=True) for chunk_id in audio_chunk_ids
+        ).apply_async()
+    except Exception:
+        release_claimed_chunks(audio_chunk_ids)
+        raise
+    
+    logger.info(f"Queued bulk STT processing for {len(audio_chunk_ids)} chunks, group: {job.id}")
+    
+    return {
+        'status': 'queued',
+        'chunks_queued': len(audio_chunk_ids),
+        'group_id': job.id,
+        'task_ids': [result.id for result in job.results]
+    }
@@ -2,21 +2,101 @@
 Views for STT processing and transcript management.
 """
 
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Round
+from django.core.cache import cache
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from encounters.models import AudioChunk, TranscriptSegment, Encounter
-from .tasks import process_audio_stt, process_encounter_audio, process_bulk_transcription
+from uploads.s3 import get_bucket_name, get_s3_client
+from .tasks import (
+    process_audio_stt,
+    process_encounter_audio,
+    process_bulk_transcription,
+    process_uploaded_audio,
+    release_claimed_chunks,
+)
 from .serializers import TranscriptSegmentSerializer
 import logging
+import os
+from itertools import groupby
+from operator import itemgetter
+import uuid
 from celery.result import AsyncResult
-from .services.whisper_service import WhisperService
+from celery.states import READY_STATES
 
 logger = logging.getLogger(__name__)
 
 
+# Seconds an in-flight task state is served from cache to polling clients
+TASK_STATE_CACHE_TTL = 1
+
+# Columns the chunk endpoints read (ownership is checked in the WHERE clause)
+AUDIO_CHUNK_STATUS_FIELDS = ('id', 'status', 'encounter')
+
+# Columns TranscriptSegmentSerializer reads; list endpoints load nothing else
+SEGMENT_LIST_FIELDS = ('id', 'segment_number', 'start_time', 'end_time', 'text', 'confidence', 'created_at')
+
+# Same datetime formatting the serializer applies to created_at
+_datetime_representation = serializers.DateTimeField().to_representation
+
+
+def owned_encounter_ids(user):
+    """
+    Subquery of the user's encounter ids.
+
+    Used instead of an encounter__doctor join in UPDATE filters so MySQL runs them as one statement.
+    """
+    return Encounter.objects.filter(doctor_id=user.id).values('id')
+
+
+def segments_with_duration():
+    """Transcript segments annotated with their duration in seconds, rounded in SQL."""
+    return TranscriptSegment.objects.annotate(
+        duration=Round(
+            ExpressionWrapper(F('end_time') - F('start_time'), output_field=FloatField()),
+            2,
+        )
+    )
+
+
+def segment_row_data(row):
+    """
+    TranscriptSegmentSerializer's output for a values() row of a segments_with_duration() queryset.
+    """
+    return {
+        'id': row['id'],
+        'segment_number': row['segment_number'],
+        'start_time': row['start_time'],
+        'end_time': row['end_time'],
+        'text': row['text'],
+        'confidence': row['confidence'],
+        'created_at': _datetime_representation(row['created_at']),
+        'duration': row['duration'],
+    }
+
+
+def segments_by_chunk(**filters):
+    """
+    Serialized segments matching `filters`, grouped by chunk id in segment order.
+
+    One values() query for every chunk at once; rows are grouped in a single pass.
+    """
+    rows = segments_with_duration().filter(**filters).order_by(
+        'audio_chunk_id', 'segment_number'
+    ).values(*SEGMENT_LIST_FIELDS, 'duration', 'audio_chunk_id')
+    return {
+        chunk_id: [segment_row_data(row) for row in group]
+        for chunk_id, group in groupby(rows, key=itemgetter('audio_chunk_id'))
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def start_stt_processing(request):
@@ -34,37 +114,45 @@ def start_stt_processing(request):
             )
         
 
-        # Get audio chunk and verify ownership
-        audio_chunk = get_object_or_404(
-            AudioChunk,
+        # Claim the chunk in one conditional UPDATE: it must belong to the user and be committed
+        chunk_id = int(chunk_id)
+        claimed = AudioChunk.objects.filter(
             id=chunk_id,
-            encounter__doctor=request.user
-        )
+            encounter_id__in=owned_encounter_ids(request.user),
+            status='committed',
+        ).update(status='processing')
         
-        # Check if chunk is committed
-        if audio_chunk.status != 'committed':
+        if not claimed:
+            # Only now look up why: missing/not owned vs. wrong status
+            chunk_status = AudioChunk.objects.filter(
+                id=chunk_id, encounter__doctor_id=request.user.id
+            ).values_list('status', flat=True).first()
+            if chunk_status is None:
+                return Response({'error': 'Audio chunk not found'}, status=status.HTTP_404_NOT_FOUND)
             return Response(
-                {'error': f'Audio chunk must be committed before processing. Current status: {audio_chunk.status}'},
+                {'error': f'Audio chunk is not committed. Current status: {chunk_status}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if already processing or processed
-        if audio_chunk.status in ['processing', 'processed']:
+        # Start STT processing task
+        try:
+            task = process_audio_stt.delay(chunk_id, claimed=True)
+        except Exception as e:
+            # Broker unavailable: release the claim so the chunk can be submitted again
+            release_claimed_chunks([chunk_id])
+            logger.error(f"Failed to queue STT processing for chunk {chunk_id}: {e}")
             return Response(
-                {'message': f'Audio chunk is already {audio_chunk.status}'},
-                status=status.HTTP_200_OK
+                {'error': 'Transcription queue unavailable, try again later'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
-        # Start STT processing task
-        task = process_audio_stt.delay(audio_chunk.id)
-        
-        logger.info(f"Started STT processing for AudioChunk {audio_chunk.id}, task: {task.id}")
+        logger.info(f"Started STT processing for AudioChunk {chunk_id}, task: {task.id}")
         
         return Response(
             {
                 'status': 'processing',
                 'task_id': task.id,
-                'audio_chunk_id': audio_chunk.id,
+                'audio_chunk_id': chunk_id,
             },
             status=status.HTTP_202_ACCEPTED,
         )
@@ -84,32 +172,32 @@ def process_encounter_stt(request, encounter_id):
     Start STT processing for all committed audio chunks in an encounter.
     """
     try:
-        # Get encounter and verify ownership
-        encounter = get_object_or_404(
-            Encounter,
-            id=encounter_id,
-            doctor=request.user
-        )
+        # Verify ownership (index lookup; only the id is read, not the encounter row)
+        encounter_pk = Encounter.objects.filter(
+            id=encounter_id, doctor_id=request.user.id
+        ).values_list('id', flat=True).first()
+        if encounter_pk is None:
+            return Response({'error': 'Encounter not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if encounter has committed chunks
-        committed_chunks = encounter.audio_chunks.filter(status='committed')
-        if not committed_chunks.exists():
+        # Check if encounter has committed chunks (one COUNT for both the check and the response)
+        committed_count = AudioChunk.objects.filter(encounter_id=encounter_pk, status='committed').count()
+        if not committed_count:
             return Response(
                 {'error': 'No committed audio chunks found in this encounter'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Start processing task
-        task = process_encounter_audio.delay(encounter.id)
+        task = process_encounter_audio.delay(encounter_pk)
         
-        logger.info(f"Started encounter STT processing for Encounter {encounter.id}, task: {task.id}")
+        logger.info(f"Started encounter STT processing for Encounter {encounter_pk}, task: {task.id}")
         
         return Response(
             {
                 'status': 'processing',
                 'task_id': task.id,
-                'encounter_id': encounter.id,
-                'chunks_to_process': committed_chunks.count(),
+                'encounter_id': encounter_pk,
+                'chunks_to_process': committed_count,
             },
             status=status.HTTP_202_ACCEPTED,
         )
@@ -131,15 +219,15 @@ def get_transcript(request, audio_chunk_id):
     try:
         # Get audio chunk and verify ownership
         audio_chunk = get_object_or_404(
-            AudioChunk,
+            AudioChunk.objects.only(*AUDIO_CHUNK_STATUS_FIELDS),
             id=audio_chunk_id,
             encounter__doctor=request.user
         )
         
-        # Get transcript segments
-        segments = TranscriptSegment.objects.filter(
+        # Get transcript segments (one query; count and text reuse the list)
+        segments = list(segments_with_duration().only(*SEGMENT_LIST_FIELDS).filter(
             audio_chunk=audio_chunk
-        ).order_by('segment_number')
+        ).order_by('segment_number'))
         
         serializer = TranscriptSegmentSerializer(segments, many=True)
         
@@ -147,8 +235,8 @@ def get_transcript(request, audio_chunk_id):
             'audio_chunk_id': audio_chunk.id,
             'status': audio_chunk.status,
             'segments': serializer.data,
-            'total_segments': segments.count(),
-            'full_text': ' '.join([seg.text for seg in segments])
+            'total_segments': len(segments),
+            'full_text': ' '.join(seg.text for seg in segments)
         })
         
     except Exception as e:
@@ -166,34 +254,37 @@ def get_encounter_transcript(request, encounter_id):
     Get full transcript for all audio chunks in an encounter.
     """
     try:
-        # Get encounter and verify ownership
-        encounter = get_object_or_404(
-            Encounter,
+        # Get encounter and verify ownership (only the columns the response uses)
+        encounter = Encounter.objects.only('id', 'status').filter(
             id=encounter_id,
-            doctor=request.user
-        )
+            doctor_id=request.user.id
+        ).first()
+        if encounter is None:
+            return Response({'error': 'Encounter not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Get all audio chunks with their segments
+        # Get all processed audio chunks and their segments (one query each)
         audio_chunks = encounter.audio_chunks.filter(
             status='processed'
-        ).order_by('chunk_number')
+        ).order_by('chunk_number').values('id', 'chunk_number', 'status')
+        segments_map = segments_by_chunk(
+            audio_chunk__encounter_id=encounter.id,
+            audio_chunk__status='processed',
+        )
         
         transcript_data = []
         full_text_parts = []
         
         for chunk in audio_chunks:
-            segments = TranscriptSegment.objects.filter(
-                audio_chunk=chunk
-            ).order_by('segment_number')
+            segments = segments_map.get(chunk['id'], [])
             
-            chunk_text = ' '.join([seg.text for seg in segments])
+            chunk_text = ' '.join([seg['text'] for seg in segments])
             full_text_parts.append(chunk_text)
             
             transcript_data.append({
-                'chunk_id': chunk.id,
-                'chunk_number': chunk.chunk_number,
-                'status': chunk.status,
-                'segments': TranscriptSegmentSerializer(segments, many=True).data,
+                'chunk_id': chunk['id'],
+                'chunk_number': chunk['chunk_number'],
+                'status': chunk['status'],
+                'segments': segments,
                 'chunk_text': chunk_text
             })
         
@@ -220,13 +311,6 @@ def update_transcript_segment(request, segment_id):
     Update a transcript segment text (manual editing).
     """
     try:
-        # Get segment and verify ownership
-        segment = get_object_or_404(
-            TranscriptSegment,
-            id=segment_id,
-            audio_chunk__encounter__doctor=request.user
-        )
-        
         new_text = request.data.get('text', '').strip()
         if not new_text:
             return Response(
@@ -234,15 +318,26 @@ def update_transcript_segment(request, segment_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update segment
-        segment.text = new_text
-        segment.save()
+        # Update segment with a single UPDATE; ownership is a subquery in the WHERE clause
+        # (not a join, which MySQL would turn into a pk SELECT followed by the UPDATE)
+        updated = TranscriptSegment.objects.filter(
+            id=segment_id,
+            audio_chunk_id__in=AudioChunk.objects.filter(
+                encounter_id__in=owned_encounter_ids(request.user)
+            ).values('id')
+        ).update(text=new_text)
+        if not updated:
+            return Response(
+                {'error': 'Transcript segment not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         
         logger.info(f"Updated transcript segment {segment_id}")
         
+        row = segments_with_duration().values(*SEGMENT_LIST_FIELDS, 'duration').get(id=segment_id)
         return Response({
             'message': 'Transcript segment updated',
-            'segment': TranscriptSegmentSerializer(segment).data
+            'segment': segment_row_data(row)
         })
         
     except Exception as e:
@@ -265,25 +360,40 @@ def search_transcript(request):
         if not query:
             return Response({'error': 'Search query is required'}, status=status.HTTP_400_BAD_REQUEST)
         # Base queryset
-        segments = TranscriptSegment.objects.filter(
+        segments = segments_with_duration().filter(
             audio_chunk__encounter__doctor=request.user,
             text__icontains=query
         )
         if encounter_id:
             segments = segments.filter(audio_chunk__encounter_id=encounter_id)
-        segments = segments.select_related(
-            'audio_chunk', 'audio_chunk__encounter'
-        ).order_by('-audio_chunk__encounter__created_at', 'audio_chunk__chunk_number', 'segment_number')
-        results = []
-        for segment in segments:
-            results.append({
-                'segment': TranscriptSegmentSerializer(segment).data,
-                'audio_chunk_id': segment.audio_chunk.id,
-                'encounter_id': segment.audio_chunk.encounter.id,
-                'patient_ref': segment.audio_chunk.encounter.patient_ref,
-                'created_at': segment.audio_chunk.encounter.created_at
-            })
-        return Response({'query': query, 'results': results, 'total_results': len(results)})
+        # فقط ستون‌های خروجی؛ بدون ساخت مدل یا serializer برای هر ردیف
+        segments = segments.order_by(
+            '-audio_chunk__encounter__created_at', 'audio_chunk__chunk_number', 'segment_number'
+        ).values(
+            *SEGMENT_LIST_FIELDS, 'duration', 'audio_chunk_id',
+            'audio_chunk__encounter_id', 'audio_chunk__encounter__patient_ref',
+            'audio_chunk__encounter__created_at',
+        )
+        # صفحه‌بندی پیش‌فرض پروژه (PageNumberPagination، PAGE_SIZE)؛ ?page=N
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(segments, request)
+        results = [
+            {
+                'segment': segment_row_data(row),
+                'audio_chunk_id': row['audio_chunk_id'],
+                'encounter_id': row['audio_chunk__encounter_id'],
+                'patient_ref': row['audio_chunk__encounter__patient_ref'],
+                'created_at': row['audio_chunk__encounter__created_at'],
+            }
+            for row in page
+        ]
+        return Response({
+            'query': query,
+            'results': results,
+            'total_results': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+        })
     except Exception as e:
         logger.error(f"Failed to search transcript: {e}")
         return Response({'error': f'Search failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -293,11 +403,18 @@ def search_transcript(request):
 @permission_classes([IsAuthenticated])
 def transcription_status(request, task_id):
     """Return Celery task status and result if available."""
-    result = AsyncResult(task_id)
-    return Response({
-        'state': result.state,
-        'result': result.result if hasattr(result, 'result') else None,
-    })
+    # کلاینت‌ها تا پایان تسک poll می‌کنند؛ وضعیت‌های در جریان یک ثانیه کش می‌شوند
+    cache_key = f'stt:task_state:{task_id}'
+    data = cache.get(cache_key)
+    if data is None:
+        result = AsyncResult(task_id)
+        state = result.state
+        ready = state in READY_STATES
+        # result فقط برای تسک تمام‌شده خوانده (و deserialize) می‌شود
+        data = {'state': state, 'result': result.result if ready else None}
+        if not ready:
+            cache.set(cache_key, data, TASK_STATE_CACHE_TTL)
+    return Response(data)
 
 
 @api_view(['GET'])
@@ -308,44 +425,67 @@ def transcription_history(request):
     if not encounter_id:
         return Response({'error': 'encounter_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     # Verify encounter ownership
-    encounter = get_object_or_404(Encounter, id=encounter_id, doctor=request.user)
-    chunks = encounter.audio_chunks.all().order_by('chunk_number')
-    data = []
-    for chunk in chunks:
-        segments = TranscriptSegment.objects.filter(audio_chunk=chunk).order_by('segment_number')
-        data.append({
-            'chunk_id': chunk.id,
-            'chunk_number': chunk.chunk_number,
-            'segments': TranscriptSegmentSerializer(segments, many=True).data,
-        })
+    if not Encounter.objects.filter(id=encounter_id, doctor_id=request.user.id).exists():
+        raise Http404
+    chunks = AudioChunk.objects.filter(encounter_id=encounter_id).order_by(
+        'chunk_number'
+    ).values_list('id', 'chunk_number')
+    segments_map = segments_by_chunk(audio_chunk__encounter_id=encounter_id)
+    data = [
+        {
+            'chunk_id': chunk_id,
+            'chunk_number': chunk_number,
+            'segments': segments_map.get(chunk_id, []),
+        }
+        for chunk_id, chunk_number in chunks
+    ]
     return Response(data)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_and_transcribe(request):
-    """Accept multipart file and transcribe directly via WhisperService."""
+    """Accept multipart file, store it and queue its transcription."""
     file = request.FILES.get('audio')
     language = request.data.get('language')
     if not file:
         return Response({'error': 'No audio file provided'}, status=status.HTTP_400_BAD_REQUEST)
-    service = WhisperService()
-    result = service.transcribe_audio_chunk(file.read(), file.name, language=language)
-    return Response(result)
+    # Whisper در ورکر Celery اجرا می‌شود؛ نتیجه از transcription-status با task_id خوانده می‌شود
+    object_key = f"transcribe_uploads/{request.user.id}/{uuid.uuid4().hex}/{os.path.basename(file.name)}"
+    get_s3_client().upload_fileobj(file, get_bucket_name(), object_key)
+    task = process_uploaded_audio.delay(object_key, file.name, language)
+    return Response({'status': 'processing', 'task_id': task.id}, status=status.HTTP_202_ACCEPTED)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def bulk_transcribe(request):
     """Queue bulk transcription for list of committed chunk ids."""
-    chunk_ids = request.data.get('chunk_ids') or []
-    # Validate all chunk ids belong to the user and are committed
-    owned_committed = list(
-        AudioChunk.objects.filter(
-            id__in=chunk_ids, encounter__doctor=request.user, status='committed'
-        ).values_list('id', flat=True)
-    )
-    if len(owned_committed) != len(chunk_ids):
+    try:
+        # Deduplicated (order kept) so the COUNT below can be compared to the input length
+        chunk_ids = list(dict.fromkeys(int(x) for x in (request.data.get('chunk_ids') or [])))
+    except (TypeError, ValueError):
+        return Response({'error': 'Invalid chunk IDs or not committed'}, status=status.HTTP_400_BAD_REQUEST)
+    # Claim the whole batch in one UPDATE: every chunk must belong to the user and still be
+    # committed, so a concurrent bulk call can't queue the same chunk twice.
+    with transaction.atomic():
+        claimed = AudioChunk.objects.filter(
+            id__in=chunk_ids,
+            encounter_id__in=owned_encounter_ids(request.user),
+            status='committed',
+        ).update(status='processing')
+        if claimed != len(chunk_ids):
+            transaction.set_rollback(True)
+    if claimed != len(chunk_ids):
         return Response({'error': 'Invalid chunk IDs or not committed'}, status=status.HTTP_400_BAD_REQUEST)
-    task = process_bulk_transcription.delay(owned_committed)
+    try:
+        task = process_bulk_transcription.delay(chunk_ids)
+    except Exception as e:
+        # Broker unavailable: release the claim so the chunks can be submitted again
+        release_claimed_chunks(chunk_ids)
+        logger.error(f"Failed to queue bulk transcription for chunks {chunk_ids}: {e}")
+        return Response(
+            {'error': 'Transcription queue unavailable, try again later'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     return Response({'status': 'processing', 'task_id': task.id}, status=status.HTTP_202_ACCEPTED)
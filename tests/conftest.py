@@ -33,6 +33,9 @@ def pytest_configure():
 		}
 	}
 
+	# Fast password hashing; create_user is called throughout the suite
+	settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 	# Guarantee Swagger endpoints enabled during tests
 	settings.SWAGGER_ENABLED = True
 
@@ -7,6 +7,8 @@
 # robust documentation integrity checks that are generally valuable and will exercise
 # changes made to Markdown documentation files in the PR.
 
+import functools
+import os
 import re
 import unittest
 from pathlib import Path
@@ -14,7 +16,7 @@ from urllib.parse import urlparse, unquote
 
 
 # Directories commonly excluded from documentation validation to avoid scanning generated or vendored content.
-_EXCLUDED_DIRS = {
+_EXCLUDED_DIRS = frozenset({
     ".git",
     ".hg",
     ".svn",
@@ -36,7 +38,16 @@ _EXCLUDED_DIRS = {
     "obj",
     "public",
     "out",
-}
+})
+
+
+# Extensions tried for extension-less link targets
+_MARKDOWN_EXTENSIONS = (".md", ".MD")
+
+
+# Inline links and images in one pass; group 1 is "!" for images. Link text may not contain
+# "![", so an image nested in a link (badges) is still matched as an image.
+_LINK_OR_IMAGE_RE = re.compile(r"(!?)\[((?:[^\]!]|!(?!\[))*)\]\(([^)\s]+?)\)")
 
 
 def _get_repo_root() -> Path:
@@ -44,17 +55,28 @@ def _get_repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
-def _is_excluded(path: Path) -> bool:
-    # Exclude if any path component is in the excluded set
-    return any(part in _EXCLUDED_DIRS for part in path.parts)
-
-
-def _iter_markdown_files(repo_root: Path) -> list[Path]:
-    files: list[Path] = []
-    for p in repo_root.rglob("*"):
-        if p.is_file() and p.suffix.lower() == ".md" and not _is_excluded(p):
-            files.append(p)
-    return files
+def _walk_repo(repo_root: Path) -> tuple[list[Path], set[Path], set[Path]]:
+    """
+    Walk the repository once, skipping excluded directories.
+    Returns:
+      - md_files: Markdown files to validate
+      - all_files: every file seen, used to resolve link targets without stat() calls
+      - all_dirs: every directory seen (including excluded ones, which are not descended into)
+    """
+    md_files: list[Path] = []
+    all_files: set[Path] = set()
+    all_dirs: set[Path] = {repo_root}
+    for dirpath, dirnames, filenames in os.walk(repo_root, followlinks=False):
+        parent = Path(dirpath)
+        all_dirs.update(parent / d for d in dirnames)
+        # Prune excluded directories in place so os.walk never descends into them
+        dirnames[:] = [d for d in dirnames if d not in _EXCLUDED_DIRS]
+        for filename in filenames:
+            path = parent / filename
+            all_files.add(path)
+            if filename.lower().endswith(".md"):
+                md_files.append(path)
+    return md_files, all_files, all_dirs
 
 
 def _split_front_matter_start_index(lines: list[str]) -> int:
@@ -82,6 +104,13 @@ def _normalize_local_target(md_file: Path, target: str, repo_root: Path) -> Path
     Convert a Markdown link target into a local filesystem candidate path if it's a local reference.
     Returns None if it's an external URL or an anchor-only link.
     """
+    return _normalize_cached(md_file.parent, target, repo_root)
+
+
+@functools.lru_cache(maxsize=8192)
+def _normalize_cached(parent: Path, target: str, repo_root: Path) -> Path | None:
+    # Keyed on the linking file's directory: the same href recurs across files and
+    # resolve() costs filesystem calls, so each (directory, href) is resolved once.
     target = unquote(target.strip())
 
     # Empty or pure anchor link
@@ -106,32 +135,37 @@ def _normalize_local_target(md_file: Path, target: str, repo_root: Path) -> Path
     if target.startswith("/"):
         candidate = (repo_root / target.lstrip("/")).resolve()
     else:
-        candidate = (md_file.parent / target).resolve()
+        candidate = (parent / target).resolve()
 
     return candidate
 
 
-def _candidate_exists(candidate: Path) -> bool:
+def _candidate_exists(candidate: Path, all_files: set[Path], all_dirs: set[Path]) -> bool:
     """
     Determine if the candidate path exists. Also allow common Markdown conventions:
-    - Directories containing README.md or index.md
+    - Directories (e.g. ones containing README.md or index.md)
     - Targets without an extension where appending .md (case-insensitive) would exist
+    Lookups go to the sets built by _walk_repo; only a miss (a target outside the walked
+    tree, e.g. beyond the repo root, inside an excluded directory or behind a symlink)
+    is checked against the filesystem.
     """
-    if candidate.exists():
+    if candidate in all_files or candidate in all_dirs:
         return True
 
-    # If candidate looks like a directory, check for README/index files
-    if candidate.is_dir():
-        for name in ("README.md", "readme.md", "INDEX.md", "index.md"):
-            if (candidate / name).exists():
-                return True
-
     # If candidate has no suffix, try adding .md
     if candidate.suffix == "":
-        for ext in (".md", ".MD"):
-            if Path(str(candidate) + ext).exists():
+        for ext in _MARKDOWN_EXTENSIONS:
+            if Path(str(candidate) + ext) in all_files:
                 return True
 
+    return _candidate_exists_on_disk(candidate)
+
+
+def _candidate_exists_on_disk(candidate: Path) -> bool:
+    if candidate.exists():
+        return True
+    if candidate.suffix == "":
+        return any(Path(str(candidate) + ext).exists() for ext in _MARKDOWN_EXTENSIONS)
     return False
 
 
@@ -145,29 +179,25 @@ def _extract_links_and_images(md_file: Path) -> tuple[list[str], list[tuple[int,
     """
     lines = md_file.read_text(encoding="utf-8", errors="ignore").splitlines()
     in_fence = False
-    fence_re = re.compile(r"^\s*```")
-    # Exclude images via negative lookbehind for plain links; parse images separately
-    link_re = re.compile(r"(?<!\!)\[[^\]]*\]\(([^)\s]+?)\)")
-    image_re = re.compile(r"!\[([^\]]*)\]\(([^)\s]+?)\)")
 
     links: list[tuple[int, str]] = []
     images: list[tuple[int, str, str]] = []
 
     for idx, line in enumerate(lines, 1):
-        if fence_re.match(line):
+        if line.lstrip().startswith("```"):
             in_fence = not in_fence
             continue
         if in_fence:
             continue
+        # Every inline link or image contains "](", most prose lines don't
+        if "](" not in line:
+            continue
 
-        for m in image_re.finditer(line):
-            alt = m.group(1) or ""
-            src = m.group(2)
-            images.append((idx, alt, src))
-
-        for m in link_re.finditer(line):
-            href = m.group(1)
-            links.append((idx, href))
+        for m in _LINK_OR_IMAGE_RE.finditer(line):
+            if m.group(1):
+                images.append((idx, m.group(2), m.group(3)))
+            else:
+                links.append((idx, m.group(3)))
 
     return lines, links, images
 
@@ -183,7 +213,9 @@ class TestMarkdownDocumentationIntegrity(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         cls.repo_root = _get_repo_root()
-        cls.md_files = _iter_markdown_files(cls.repo_root)
+        cls.md_files, cls.all_files, cls.all_dirs = _walk_repo(cls.repo_root)
+        # Read and parse every file once; each test works from (lines, links, images)
+        cls.parsed = {md: _extract_links_and_images(md) for md in cls.md_files}
 
     def test_no_broken_relative_links_in_markdown(self):
         """
@@ -193,7 +225,7 @@ class TestMarkdownDocumentationIntegrity(unittest.TestCase):
         """
         broken: list[str] = []
         for md in self.md_files:
-            _, links, images = _extract_links_and_images(md)
+            _, links, images = self.parsed[md]
 
             # Validate standard links
             for ln, href in links:
@@ -201,7 +233,7 @@ class TestMarkdownDocumentationIntegrity(unittest.TestCase):
                 if candidate is None:
                     # External or anchor link - skip
                     continue
-                if not _candidate_exists(candidate):
+                if not _candidate_exists(candidate, self.all_files, self.all_dirs):
                     broken.append(f"{md}:{ln} -> {href} (resolved: {candidate})")
 
             # Validate image sources
@@ -210,7 +242,7 @@ class TestMarkdownDocumentationIntegrity(unittest.TestCase):
                 if candidate is None:
                     # External or anchor image (rare) - skip
                     continue
-                if not _candidate_exists(candidate):
+                if not _candidate_exists(candidate, self.all_files, self.all_dirs):
                     broken.append(f"{md}:{ln} -> image {src} (resolved: {candidate})")
 
         if broken:
@@ -223,7 +255,10 @@ class TestMarkdownDocumentationIntegrity(unittest.TestCase):
         """
         failures: list[str] = []
         for md in self.md_files:
-            lines = md.read_text(encoding="utf-8", errors="ignore").splitlines()
+            lines = self.parsed[md][0]
+            # Common case: ATX heading on the very first line, no front matter to scan
+            if lines and lines[0].startswith("#"):
+                continue
             start = _split_front_matter_start_index(lines)
 
             # Skip blank lines after front matter
@@ -260,7 +295,7 @@ class TestMarkdownDocumentationIntegrity(unittest.TestCase):
         """
         missing_alt: list[str] = []
         for md in self.md_files:
-            _, _links, images = _extract_links_and_images(md)
+            _, _links, images = self.parsed[md]
             for ln, alt, src in images:
                 if alt.strip() == "":
                     missing_alt.append(f"{md}:{ln} -> {src}")
@@ -0,0 +1,58 @@
+"""
+Tests for the HMAC middleware installed as infra.middleware.HMACMiddleware.
+"""
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from infra.middleware import HMACMiddleware
+
+
+class HMACAuthMiddlewareTest(TestCase):
+    """Only the static service-to-service prefixes require a signature."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = HMACMiddleware(lambda request: HttpResponse('ok'))
+
+    def sign(self, method, path, timestamp, nonce):
+        message = f"{method}:{path}:{timestamp}:{nonce}"
+        secret = getattr(settings, 'HMAC_SECRET_KEY', settings.SECRET_KEY)
+        return hmac.new(secret.encode('utf-8'), message.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def test_integrations_paths_not_enforced(self):
+        """OTP and health endpoints stay reachable without a signature"""
+        for path in ('/api/integrations/otp/send/', '/api/integrations/health/'):
+            response = self.middleware(self.factory.get(path))
+            self.assertEqual(response.status_code, 200, path)
+
+    def test_skip_prefixes(self):
+        """Probes, admin, docs and assets are never checked"""
+        for path in ('/healthz', '/admin/login/', '/static/app.css', '/swagger/'):
+            response = self.middleware(self.factory.get(path))
+            self.assertEqual(response.status_code, 200, path)
+
+    def test_internal_requires_signature(self):
+        """An unsigned internal request is rejected"""
+        response = self.middleware(self.factory.get('/internal/sync/'))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_internal_signed_request(self):
+        """A correctly signed internal request passes once"""
+        timestamp = str(time.time())
+        headers = {
+            'HTTP_X_HMAC_SIGNATURE': self.sign('GET', '/internal/sync/', timestamp, 'n1'),
+            'HTTP_X_TIMESTAMP': timestamp,
+            'HTTP_X_NONCE': 'n1',
+        }
+
+        self.assertEqual(self.middleware(self.factory.get('/internal/sync/', **headers)).status_code, 200)
+        # The nonce cannot be replayed
+        self.assertEqual(self.middleware(self.factory.get('/internal/sync/', **headers)).status_code, 401)
@@ -0,0 +1,66 @@
+"""
+Tests for the atomic fixed-window throttles in infra.throttling.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from infra.throttling import UserRateThrottle
+
+
+class TwoPerFiveMinutesThrottle(UserRateThrottle):
+    rate = '2/5m'
+
+
+class AtomicCounterThrottleTest(TestCase):
+    """Test the throttles through the locmem cache fallback."""
+
+    def setUp(self):
+        cache.clear()
+        self.request = SimpleNamespace(user=SimpleNamespace(is_authenticated=True, pk=1), META={})
+        self.view = None
+
+    def test_parse_rate_with_period_count(self):
+        """'5/5m' is five requests per 300 seconds; plain DRF periods still parse."""
+        throttle = TwoPerFiveMinutesThrottle()
+        self.assertEqual(throttle.parse_rate('5/5m'), (5, 300))
+        self.assertEqual(throttle.parse_rate('100/hour'), (100, 3600))
+        self.assertEqual(throttle.parse_rate('10/s'), (10, 1))
+        self.assertEqual(throttle.parse_rate(None), (None, None))
+
+    def test_parse_rate_malformed(self):
+        """A malformed rate is a configuration error, not an AttributeError."""
+        throttle = TwoPerFiveMinutesThrottle()
+        for rate in ('5/xyz', '5', 'five/m'):
+            with self.assertRaises(ImproperlyConfigured):
+                throttle.parse_rate(rate)
+
+    def test_allow_then_deny(self):
+        """Requests within the rate are allowed, the next one is denied."""
+        self.assertTrue(TwoPerFiveMinutesThrottle().allow_request(self.request, self.view))
+        self.assertTrue(TwoPerFiveMinutesThrottle().allow_request(self.request, self.view))
+
+        throttle = TwoPerFiveMinutesThrottle()
+        self.assertFalse(throttle.allow_request(self.request, self.view))
+        self.assertEqual(throttle.wait(), 300)
+
+    def test_counts_per_user(self):
+        """Each user has their own window."""
+        other = SimpleNamespace(user=SimpleNamespace(is_authenticated=True, pk=2), META={})
+        for _ in range(2):
+            TwoPerFiveMinutesThrottle().allow_request(self.request, self.view)
+
+        self.assertTrue(TwoPerFiveMinutesThrottle().allow_request(other, self.view))
+
+    def test_fail_open_when_store_unavailable(self):
+        """A Redis error allows the request instead of failing it."""
+        client = MagicMock()
+        client.pipeline.return_value.execute.side_effect = ConnectionError("Redis down")
+
+        with patch('django_redis.get_redis_connection', return_value=client):
+            allowed = TwoPerFiveMinutesThrottle().allow_request(self.request, self.view)
+
+        self.assertTrue(allowed)
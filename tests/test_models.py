@@ -11,6 +11,7 @@ from checklist.models import ChecklistCatalog, ChecklistEval, ChecklistTemplate
 from analytics.models import Metric, UserActivity, PerformanceMetric
 from outputs.models import FinalizedSOAP
 from nlp.models import SOAPDraft
+from search.models import SearchableContent
 
 
 User = get_user_model()
@@ -221,3 +222,70 @@ class FinalizedSOAPModelTest(TestCase):
 
         expected_str = f"Finalized SOAP for {soap_draft.encounter}"
         self.assertEqual(str(artifacts), expected_str)
+
+
+class SearchableContentContentTypeTest(TestCase):
+    """Test the name <-> smallint code mapping of SearchableContent.content_type."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testdoc',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.encounter = Encounter.objects.create(
+            doctor=self.user,
+            patient_ref="P12345"
+        )
+        self.item = SearchableContent.objects.create(
+            encounter=self.encounter,
+            content_type='soap',
+            content_id=1,
+            title='SOAP',
+            content='Patient complains of headache',
+            metadata={'section': 'subjective'}
+        )
+    
+    def test_round_trip(self):
+        """The name is written as its code and read back as the name."""
+        item = SearchableContent.objects.get(pk=self.item.pk)
+        self.assertEqual(item.content_type, 'soap')
+        
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT content_type FROM {SearchableContent._meta.db_table} WHERE id = %s",
+                [self.item.pk]
+            )
+            self.assertEqual(cursor.fetchone()[0], SearchableContent.CONTENT_TYPE_CODES['soap'])
+    
+    def test_filter_by_name(self):
+        """Filters take names, including __in lookups."""
+        self.assertTrue(SearchableContent.objects.filter(content_type='soap').exists())
+        self.assertTrue(SearchableContent.objects.filter(content_type__in=['soap', 'notes']).exists())
+        self.assertFalse(SearchableContent.objects.filter(content_type='transcript').exists())
+    
+    def test_values_returns_names(self):
+        """values()/values_list() return names, not codes."""
+        row = SearchableContent.objects.values('content_type').get(pk=self.item.pk)
+        self.assertEqual(row['content_type'], 'soap')
+        self.assertEqual(
+            list(SearchableContent.objects.values_list('content_type', flat=True)),
+            ['soap']
+        )
+    
+    def test_unknown_name_matches_nothing(self):
+        """An unknown name filters to no rows instead of raising."""
+        self.assertFalse(SearchableContent.objects.filter(content_type='unknown').exists())
+    
+    def test_clean(self):
+        """clean()/full_clean() validate the name and range-check the stored code."""
+        field = SearchableContent._meta.get_field('content_type')
+        self.assertEqual(field.clean('soap', None), 'soap')
+        with self.assertRaises(ValidationError):
+            field.clean('unknown', None)
+        
+        self.item.full_clean()
+        self.item.content_type = 'unknown'
+        with self.assertRaises(ValidationError):
+            self.item.full_clean()
@@ -3,7 +3,9 @@ from django.contrib.auth import get_user_model
 from encounters.models import Encounter
 from nlp.models import SOAPDraft
 from outputs.models import FinalizedSOAP, OutputFile, PatientLink
+from datetime import timedelta
 from django.utils import timezone
+from outputs.serializers import OutputFileSerializer, PatientLinkSerializer
 
 
 User = get_user_model()
@@ -26,3 +28,34 @@ class OutputsModelsExtraTest(TestCase):
 		url = pl.generate_access_url('https://example.com')
 		assert 'https://example.com/patient/' in url
 
+
+class OutputsTimestampChecksTest(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='doc', email='d@e.com', password='x')
+		self.encounter = Encounter.objects.create(doctor=self.user, patient_ref='P1')
+		# bulk_create skips SOAPDraft.save, which uses transaction without importing it
+		self.draft = SOAPDraft.objects.bulk_create([SOAPDraft(encounter=self.encounter, soap_data={})])[0]
+		self.final = FinalizedSOAP.objects.create(soap_draft=self.draft)
+
+	def test_patient_link_checks_at_given_time(self):
+		now = timezone.now()
+		pl = PatientLink.objects.create(finalized_soap=self.final, access_token='t', status='sent', expires_at=now + timedelta(hours=1))
+		assert pl.get_is_accessible(now=now) and not pl.get_is_expired(now=now)
+		later = now + timedelta(hours=2)
+		assert pl.get_is_expired(now=later) and not pl.get_is_accessible(now=later)
+
+	def test_presigned_url_valid_at_given_time(self):
+		now = timezone.now()
+		f = OutputFile.objects.create(finalized_soap=self.final, file_type='json', file_path='k', file_size=1, presigned_url='https://s3/x', presigned_expires_at=now + timedelta(minutes=5))
+		assert f.get_is_presigned_url_valid(now=now)
+		assert not f.get_is_presigned_url_valid(now=now + timedelta(minutes=10))
+
+	def test_serializers_use_shared_timestamp(self):
+		now = timezone.now()
+		pl = PatientLink.objects.create(finalized_soap=self.final, access_token='t', status='sent', expires_at=now + timedelta(hours=1))
+		f = OutputFile.objects.create(finalized_soap=self.final, file_type='json', file_path='k', file_size=1, presigned_url='https://s3/x', presigned_expires_at=now + timedelta(hours=1))
+		context = {'_now': now + timedelta(hours=2)}
+		link_data = PatientLinkSerializer(pl, context=context).data
+		assert link_data['is_expired'] and not link_data['is_accessible']
+		file_data = OutputFileSerializer(f, context=context).data
+		assert not file_data['is_presigned_url_valid'] and file_data['download_url'] is None
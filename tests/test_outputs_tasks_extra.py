@@ -0,0 +1,270 @@
+"""
+Tests for the finalize -> outputs Celery chain and output generation with mocked S3/GPT.
+"""
+
+from unittest.mock import ANY, call, patch, MagicMock
+
+import orjson
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from encounters.models import Encounter
+from nlp.models import SOAPDraft
+from outputs.models import FinalizedSOAP, OutputFile
+from outputs.tasks import create_patient_links_and_notify_bulk, finalize_soap_note, generate_all_outputs
+from outputs.views import start_finalization
+
+User = get_user_model()
+
+SOAP_DATA = {
+    "subjective": {"content": "Headache"},
+    "objective": {"content": "BP 120/80"},
+    "assessment": {"content": "Tension headache"},
+    "plan": {"content": "Rest"}
+}
+
+
+def create_soap_draft(encounter, **kwargs):
+    """Create a SOAPDraft without going through SOAPDraft.save."""
+    # SOAPDraft.save uses transaction.atomic, which nlp.models does not import
+    return SOAPDraft.objects.bulk_create([SOAPDraft(encounter=encounter, **kwargs)])[0]
+
+
+def run_with_chain(task, *args):
+    """Run a bound task body with a pending chain on its request."""
+    task.push_request(chain=[{'task': 'outputs.tasks.generate_all_outputs'}], retries=0)
+    try:
+        return task.run(*args), task.request.chain
+    finally:
+        task.pop_request()
+
+
+class FinalizeChainTest(TestCase):
+    """Test the finalize_soap_note | generate_all_outputs chain"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username='testdoc',
+            email='doc@test.com',
+            password='pass123'
+        )
+        self.encounter = Encounter.objects.create(doctor=self.doctor, patient_ref='P12345')
+        self.soap_draft = create_soap_draft(self.encounter, soap_data=SOAP_DATA, status='draft')
+
+    @patch('outputs.views.generate_all_outputs')
+    @patch('outputs.views.finalize_soap_note')
+    def test_start_finalization_applies_chain(self, mock_finalize, mock_outputs):
+        """The view queues one chain of finalize and output generation"""
+        mock_chain = MagicMock()
+        mock_chain.apply_async.return_value.id = 'chain-123'
+        mock_finalize.s.return_value.__or__.return_value = mock_chain
+
+        request = APIRequestFactory().post('/api/outputs/finalize/')
+        force_authenticate(request, user=self.doctor)
+        response = start_finalization(request, encounter_id=self.encounter.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['task_id'], 'chain-123')
+        mock_finalize.s.assert_called_once_with(self.soap_draft.id)
+        mock_outputs.s.assert_called_once_with()
+        mock_finalize.s.return_value.__or__.assert_called_once_with(mock_outputs.s.return_value)
+        mock_chain.apply_async.assert_called_once_with()
+
+    @patch('outputs.tasks._finalization_service')
+    def test_finalize_returns_id_for_next_link(self, mock_service):
+        """On success the FinalizedSOAP id is handed to generate_all_outputs"""
+        mock_service.return_value.finalize_soap_draft.return_value = {
+            'finalized_data': SOAP_DATA,
+            'quality_score': 0.9
+        }
+
+        result, chain = run_with_chain(finalize_soap_note, self.soap_draft.id)
+
+        finalized = FinalizedSOAP.objects.get(soap_draft=self.soap_draft)
+        self.assertEqual(result, finalized.id)
+        self.assertEqual(finalized.status, 'finalized')
+        self.assertIsNotNone(chain)
+
+    def test_finalize_missing_draft_drops_chain(self):
+        """A missing draft stops the chain before output generation"""
+        result, chain = run_with_chain(finalize_soap_note, 999999)
+
+        self.assertEqual(result, {'error': 'SOAP draft not found'})
+        self.assertIsNone(chain)
+
+    @patch('outputs.tasks._finalization_service')
+    def test_finalize_in_progress_drops_chain(self, mock_service):
+        """A draft already being finalized is skipped along with the rest of the chain"""
+        FinalizedSOAP.objects.create(soap_draft=self.soap_draft, status='finalizing')
+
+        result, chain = run_with_chain(finalize_soap_note, self.soap_draft.id)
+
+        self.assertEqual(result, {'status': 'already_finalizing'})
+        self.assertIsNone(chain)
+        mock_service.return_value.finalize_soap_draft.assert_not_called()
+
+    def test_generate_all_outputs_passes_upstream_error_through(self):
+        """An upstream error dict is returned unchanged (eager mode ignores request.chain)"""
+        upstream = {'error': 'SOAP draft not found'}
+
+        self.assertEqual(generate_all_outputs(upstream), upstream)
+        self.assertFalse(OutputFile.objects.exists())
+
+
+@patch('outputs.tasks._finalization_service')
+@patch('outputs.tasks._pdf_service')
+@patch('outputs.tasks._template_service')
+@patch('outputs.tasks._s3_client')
+@override_settings(AWS_STORAGE_BUCKET_NAME='test-bucket')
+class GenerateAllOutputsTest(TestCase):
+    """Test generate_all_outputs with S3, PDF rendering and GPT mocked"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username='testdoc',
+            email='doc@test.com',
+            password='pass123'
+        )
+        self.encounter = Encounter.objects.create(doctor=self.doctor, patient_ref='P12345')
+        self.soap_draft = create_soap_draft(self.encounter, soap_data=SOAP_DATA, status='draft')
+        self.finalized = FinalizedSOAP.objects.create(
+            soap_draft=self.soap_draft,
+            finalized_data=SOAP_DATA,
+            status='finalized'
+        )
+
+    def configure(self, mock_s3, mock_template, mock_pdf, mock_finalization):
+        """Give the mocked services realistic return values."""
+        template = mock_template.return_value
+        template.generate_markdown_doctor.return_value = '# SOAP Note'
+        template.generate_markdown_patient.return_value = '# Your visit'
+        template.generate_html_from_markdown.return_value = '<h1>SOAP</h1>'
+        mock_pdf.return_value.generate_pdf_from_html.side_effect = lambda html, filename: {
+            's3_key': f'outputs/pdf/{filename}',
+            'file_size': 2048,
+            'generation_time': 0.5
+        }
+        mock_finalization.return_value.enhance_for_patient_version.return_value = {
+            'summary': 'Rest and drink water'
+        }
+        return mock_s3.return_value
+
+    def uploaded_keys(self, s3_client):
+        return [c.kwargs['Key'] for c in s3_client.put_object.call_args_list]
+
+    def test_generates_every_format(self, mock_s3, mock_template, mock_pdf, mock_finalization):
+        """JSON, Markdown and both PDFs are uploaded and recorded"""
+        s3_client = self.configure(mock_s3, mock_template, mock_pdf, mock_finalization)
+
+        result = generate_all_outputs(self.finalized.id)
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(
+            sorted(self.uploaded_keys(s3_client)),
+            [
+                f'outputs/json/soap_note_P12345_{self.finalized.id}.json',
+                f'outputs/md/soap_doctor_P12345_{self.finalized.id}.md',
+            ]
+        )
+        json_body = next(
+            c.kwargs['Body'] for c in s3_client.put_object.call_args_list
+            if c.kwargs['Key'].endswith('.json')
+        )
+        self.assertTrue(json_body.startswith(b'{\n  "soap_note": {\n'))
+        self.assertEqual(orjson.loads(json_body)['soap_note'], SOAP_DATA)
+        self.assertEqual(
+            set(OutputFile.objects.filter(finalized_soap=self.finalized).values_list('file_type', flat=True)),
+            {'json', 'markdown', 'pdf_doctor', 'pdf_patient'}
+        )
+
+        self.finalized.refresh_from_db()
+        self.assertEqual(self.finalized.status, 'exported')
+        self.assertIsNotNone(self.finalized.exported_at)
+        self.assertEqual(self.finalized.markdown_content_hash, self.finalized.finalized_data_hash)
+        self.assertEqual(self.finalized.patient_summary_hash, self.finalized.finalized_data_hash)
+
+    def test_reexport_upserts_output_files(self, mock_s3, mock_template, mock_pdf, mock_finalization):
+        """Existing (finalized_soap, file_type) rows are replaced, not duplicated"""
+        self.configure(mock_s3, mock_template, mock_pdf, mock_finalization)
+        stale = OutputFile.objects.create(
+            finalized_soap=self.finalized,
+            file_type='json',
+            file_path='outputs/json/stale.json',
+            file_size=1
+        )
+
+        generate_all_outputs(self.finalized.id)
+        generate_all_outputs(self.finalized.id)
+
+        self.assertEqual(OutputFile.objects.filter(finalized_soap=self.finalized).count(), 4)
+        json_file = OutputFile.objects.get(finalized_soap=self.finalized, file_type='json')
+        self.assertEqual(json_file.id, stale.id)
+        self.assertEqual(json_file.file_path, f'outputs/json/soap_note_P12345_{self.finalized.id}.json')
+        self.assertGreater(json_file.file_size, 1)
+
+    def test_unchanged_data_reuses_summary_and_markdown(self, mock_s3, mock_template, mock_pdf, mock_finalization):
+        """A second run with the same finalized_data skips GPT and the Markdown upload"""
+        s3_client = self.configure(mock_s3, mock_template, mock_pdf, mock_finalization)
+        generate_all_outputs(self.finalized.id)
+        s3_client.put_object.reset_mock()
+
+        result = generate_all_outputs(self.finalized.id)
+
+        self.assertEqual(result['results']['markdown'], {'status': 'success', 'skipped': True})
+        self.assertEqual(
+            self.uploaded_keys(s3_client),
+            [f'outputs/json/soap_note_P12345_{self.finalized.id}.json']
+        )
+        mock_finalization.return_value.enhance_for_patient_version.assert_called_once()
+        mock_template.return_value.generate_markdown_patient.assert_called_with(
+            {'summary': 'Rest and drink water'},
+            ANY
+        )
+
+    def test_changed_data_regenerates_summary_and_markdown(self, mock_s3, mock_template, mock_pdf, mock_finalization):
+        """Editing finalized_data invalidates the cached summary and Markdown"""
+        s3_client = self.configure(mock_s3, mock_template, mock_pdf, mock_finalization)
+        generate_all_outputs(self.finalized.id)
+        s3_client.put_object.reset_mock()
+
+        self.finalized.finalized_data = {**SOAP_DATA, "plan": {"content": "Ibuprofen"}}
+        self.finalized.save(update_fields=['finalized_data'])
+        result = generate_all_outputs(self.finalized.id)
+
+        self.assertNotIn('skipped', result['results']['markdown'])
+        self.assertIn(
+            f'outputs/md/soap_doctor_P12345_{self.finalized.id}.md',
+            self.uploaded_keys(s3_client)
+        )
+        self.assertEqual(mock_finalization.return_value.enhance_for_patient_version.call_count, 2)
+
+        self.finalized.refresh_from_db()
+        self.assertEqual(self.finalized.markdown_content_hash, self.finalized.finalized_data_hash)
+        self.assertEqual(self.finalized.patient_summary_hash, self.finalized.finalized_data_hash)
+
+
+class BulkPatientLinkTaskTest(TestCase):
+    """Test create_patient_links_and_notify_bulk"""
+
+    @patch('outputs.tasks.create_patient_link_and_notify')
+    def test_publishes_through_one_producer(self, mock_task):
+        """Every item is published with the same acquired producer"""
+        producer = mock_task.app.producer_or_acquire.return_value.__enter__.return_value
+        items = [
+            {'finalized_soap_id': 1, 'delivery_info': {'method': 'sms', 'phone': '09120000000'}},
+            {'finalized_soap_id': 2},
+        ]
+
+        result = create_patient_links_and_notify_bulk(items)
+
+        self.assertEqual(result, {'status': 'queued', 'count': 2})
+        mock_task.app.producer_or_acquire.assert_called_once_with()
+        self.assertEqual(
+            mock_task.apply_async.call_args_list,
+            [
+                call(args=(1, {'method': 'sms', 'phone': '09120000000'}), producer=producer),
+                call(args=(2, {}), producer=producer),
+            ]
+        )
@@ -0,0 +1,281 @@
+"""
+Tests for the patient link views and their notification tasks.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from encounters.models import Encounter
+from nlp.models import SOAPDraft
+from outputs.models import FinalizedSOAP, OutputFile, PatientLink
+from outputs.tasks import send_patient_link_notification
+from outputs.views import create_patient_link, get_finalized_soap
+
+User = get_user_model()
+
+
+def create_soap_draft(encounter, **kwargs):
+    """Create a SOAPDraft without going through SOAPDraft.save."""
+    # SOAPDraft.save uses transaction.atomic, which nlp.models does not import
+    return SOAPDraft.objects.bulk_create([SOAPDraft(encounter=encounter, **kwargs)])[0]
+
+
+class GetFinalizedSOAPMarkdownTest(TestCase):
+    """Test how get_finalized_soap exposes the doctor Markdown"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username='testdoc',
+            email='doc@test.com',
+            password='pass123'
+        )
+        self.encounter = Encounter.objects.create(doctor=self.doctor, patient_ref='P12345')
+        self.finalized = FinalizedSOAP.objects.create(
+            soap_draft=create_soap_draft(self.encounter, soap_data={}, status='draft'),
+            finalized_data={},
+            status='exported',
+            markdown_content='# Legacy SOAP'
+        )
+
+    def get(self):
+        request = APIRequestFactory().get('/api/outputs/finalized/')
+        force_authenticate(request, user=self.doctor)
+        return get_finalized_soap(request, encounter_id=self.encounter.id)
+
+    def test_legacy_note_falls_back_to_markdown_content(self):
+        """Notes exported before the S3 Markdown keep serving their inline body"""
+        response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['markdown_file'])
+        self.assertEqual(response.data['markdown_content'], '# Legacy SOAP')
+
+    def test_markdown_output_file_takes_precedence(self):
+        """Once a Markdown OutputFile exists it replaces the inline body"""
+        markdown_file = OutputFile.objects.create(
+            finalized_soap=self.finalized,
+            file_type='markdown',
+            file_path='outputs/md/soap_doctor_P12345.md',
+            file_size=13
+        )
+
+        response = self.get()
+
+        self.assertEqual(response.data['markdown_file']['id'], markdown_file.id)
+        self.assertIsNone(response.data['markdown_content'])
+
+    def test_no_markdown(self):
+        """A note without either source returns nulls"""
+        FinalizedSOAP.objects.filter(id=self.finalized.id).update(markdown_content='')
+
+        response = self.get()
+
+        self.assertIsNone(response.data['markdown_file'])
+        self.assertIsNone(response.data['markdown_content'])
+
+
+class CreatePatientLinkViewTest(TestCase):
+    """Test create_patient_link, which now creates the link inline"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username='testdoc',
+            email='doc@test.com',
+            password='pass123'
+        )
+        self.encounter = Encounter.objects.create(doctor=self.doctor, patient_ref='P12345')
+        self.soap_draft = create_soap_draft(self.encounter, soap_data={}, status='draft')
+        self.finalized = FinalizedSOAP.objects.create(
+            soap_draft=self.soap_draft,
+            finalized_data={},
+            status='exported'
+        )
+
+    def post(self, data, user=None):
+        request = APIRequestFactory().post('/api/outputs/link-patient/', data, format='json')
+        force_authenticate(request, user=user or self.doctor)
+        return create_patient_link(request, encounter_id=self.encounter.id)
+
+    @patch('outputs.views.send_patient_link_notification.delay')
+    def test_create_link_returns_link_details(self, mock_notify):
+        """The response carries link_id, access_url and expires_at instead of a task id"""
+        response = self.post({'delivery_method': 'sms', 'patient_phone': '09120000000', 'expiry_hours': 24})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('task_id', response.data)
+
+        patient_link = PatientLink.objects.get(finalized_soap=self.finalized)
+        self.assertEqual(response.data['link_id'], str(patient_link.link_id))
+        self.assertEqual(response.data['access_url'], patient_link.generate_access_url())
+        self.assertEqual(response.data['expires_at'], patient_link.expires_at)
+        self.assertAlmostEqual(
+            (patient_link.expires_at - timezone.now()).total_seconds(),
+            timedelta(hours=24).total_seconds(),
+            delta=60
+        )
+        mock_notify.assert_called_once_with(str(patient_link.link_id))
+
+    @patch('outputs.views.send_patient_link_notification.delay')
+    def test_direct_link_is_not_delivered(self, mock_notify):
+        """Direct links are returned to the doctor without queueing a notification"""
+        response = self.post({'delivery_method': 'direct'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(PatientLink.objects.filter(link_id=response.data['link_id']).exists())
+        mock_notify.assert_not_called()
+
+    @patch('outputs.views.send_patient_link_notification.delay')
+    def test_existing_link_is_reused(self, mock_notify):
+        """A live link for the same recipient is returned instead of creating another"""
+        first = self.post({'delivery_method': 'sms', 'patient_phone': '09120000000'})
+        mock_notify.reset_mock()
+
+        second = self.post({'delivery_method': 'sms', 'patient_phone': '09120000000'})
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['message'], 'Existing patient link reused')
+        self.assertEqual(second.data['link_id'], first.data['link_id'])
+        self.assertEqual(second.data['access_url'], first.data['access_url'])
+        self.assertEqual(PatientLink.objects.count(), 1)
+        mock_notify.assert_not_called()
+
+    @patch('outputs.views.send_patient_link_notification.delay')
+    def test_invalid_expiry_hours(self, mock_notify):
+        """A non-integer expiry_hours is rejected before any link is created"""
+        response = self.post({'delivery_method': 'direct', 'expiry_hours': 'soon'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PatientLink.objects.exists())
+        mock_notify.assert_not_called()
+
+    def test_sms_requires_phone(self):
+        """SMS delivery without a phone number is rejected"""
+        response = self.post({'delivery_method': 'sms'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PatientLink.objects.exists())
+
+    def test_not_exported(self):
+        """Links are only created once every output has been generated"""
+        FinalizedSOAP.objects.filter(id=self.finalized.id).update(status='finalized')
+
+        response = self.post({'delivery_method': 'direct'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PatientLink.objects.exists())
+
+    def test_other_doctor(self):
+        """Another doctor cannot link a patient to this encounter"""
+        other = User.objects.create_user(username='otherdoc', email='other@test.com', password='pass123')
+
+        response = self.post({'delivery_method': 'direct'}, user=other)
+
+        # The view's catch-all turns the 404 into a 500; either way nothing is created
+        self.assertGreaterEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PatientLink.objects.exists())
+
+
+class BulkCreatePatientLinksViewTest(TestCase):
+    """Test the admin-only bulk patient link endpoint"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='pass123',
+            is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse('outputs:link-patient-bulk')
+        self.items = [
+            {'finalized_soap_id': 1, 'delivery_info': {'method': 'sms', 'phone': '09120000000'}},
+            {'finalized_soap_id': 2, 'delivery_info': {'method': 'email', 'email': 'p@test.com'}},
+        ]
+
+    @patch('outputs.views.create_patient_links_and_notify_bulk.delay')
+    def test_bulk_create_queues_one_task(self, mock_bulk):
+        """All items are handed to a single bulk task"""
+        mock_bulk.return_value.id = 'bulk-123'
+
+        response = self.client.post(self.url, {'items': self.items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['task_id'], 'bulk-123')
+        self.assertEqual(response.data['count'], 2)
+        mock_bulk.assert_called_once_with(self.items)
+
+    @patch('outputs.views.create_patient_links_and_notify_bulk.delay')
+    def test_bulk_create_requires_admin(self, mock_bulk):
+        """Doctors cannot use the bulk endpoint"""
+        doctor = User.objects.create_user(username='testdoc', email='doc@test.com', password='pass123')
+        self.client.force_authenticate(user=doctor)
+
+        response = self.client.post(self.url, {'items': self.items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        mock_bulk.assert_not_called()
+
+    @patch('outputs.views.create_patient_links_and_notify_bulk.delay')
+    def test_bulk_create_invalid_items(self, mock_bulk):
+        """Items must be a non-empty list of dicts with finalized_soap_id"""
+        for items in ([], 'x', [{'delivery_info': {}}], [1]):
+            response = self.client.post(self.url, {'items': items}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_bulk.assert_not_called()
+
+    @patch('outputs.views.create_patient_links_and_notify_bulk.delay')
+    def test_bulk_create_enqueue_error(self, mock_bulk):
+        """A broker failure is reported as a server error"""
+        mock_bulk.side_effect = ConnectionError("Broker down")
+
+        response = self.client.post(self.url, {'items': self.items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SendPatientLinkNotificationTest(TestCase):
+    """Test the worker-side delivery of an already created link"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username='testdoc',
+            email='doc@test.com',
+            password='pass123'
+        )
+        encounter = Encounter.objects.create(doctor=self.doctor, patient_ref='P12345')
+        finalized = FinalizedSOAP.objects.create(
+            soap_draft=create_soap_draft(encounter, soap_data={}, status='draft'),
+            finalized_data={},
+            status='exported'
+        )
+        self.patient_link = PatientLink.objects.create(
+            finalized_soap=finalized,
+            access_token='token',
+            delivery_method='sms',
+            patient_phone='09120000000',
+            expires_at=timezone.now() + timedelta(hours=72)
+        )
+
+    def test_marks_link_as_sent(self):
+        """Delivering the notification marks the link as sent"""
+        send_patient_link_notification(str(self.patient_link.link_id))
+
+        self.patient_link.refresh_from_db()
+        self.assertEqual(self.patient_link.status, 'sent')
+        self.assertIsNotNone(self.patient_link.sent_at)
+
+    def test_missing_link(self):
+        """An unknown link id is logged and ignored"""
+        PatientLink.objects.all().delete()
+
+        send_patient_link_notification(str(self.patient_link.link_id))
+
+        self.assertFalse(PatientLink.objects.exists())
@@ -9,8 +9,9 @@ from django.contrib.auth import get_user_model
 from checklist.services import ChecklistEvaluationService
 from embeddings.services import EmbeddingService
 from analytics.services import AnalyticsService
-from search.services import HybridSearchService
+from search.services import HybridSearchService, fulltext_prefix_query, _websearch_to_boolean
 from encounters.models import Encounter, TranscriptSegment
+from search.models import SearchableContent, SearchQuery, SearchResult
 
 User = get_user_model()
 
@@ -156,6 +157,32 @@ class HybridSearchServiceTest(TestCase):
         self.assertLessEqual(len(snippet), 60)  # Account for ellipsis
         self.assertIn("patient", snippet.lower())
     
+    def test_generate_snippet_densest_window(self):
+        """The snippet is the window holding the most query-term hits, not the first hit."""
+        content = "fever " + "a" * 250 + " fever cough fever " + "b" * 250
+        
+        snippet = self.service._generate_snippet(content, "fever cough", max_length=50)
+        
+        self.assertTrue(snippet.startswith("...fever cough fever"))
+        self.assertTrue(snippet.endswith("..."))
+        self.assertEqual(len(snippet), 50 + 6)
+    
+    def test_generate_snippet_fallbacks(self):
+        """Short content is returned whole; without hits the prefix is used."""
+        self.assertEqual(self.service._generate_snippet("short text", "fever", max_length=50), "short text")
+        self.assertEqual(self.service._generate_snippet("", "fever"), "")
+        
+        content = "a" * 100
+        self.assertEqual(self.service._generate_snippet(content, "fever", max_length=50), "a" * 50 + "...")
+    
+    def test_generate_snippet_window_at_end(self):
+        """A hit near the end still yields a full-length window."""
+        content = "a" * 100 + " fever"
+        
+        snippet = self.service._generate_snippet(content, "fever", max_length=50)
+        
+        self.assertEqual(snippet, "..." + content[-50:])
+    
     @patch('search.services.SearchableContent.objects')
     def test_index_content(self, mock_objects):
         """Test content indexing."""
@@ -173,4 +200,194 @@ class HybridSearchServiceTest(TestCase):
         )
         
         mock_objects.update_or_create.assert_called_once()
-        self.assertEqual(result, mock_content)
\ No newline at end of file
+        self.assertEqual(result, mock_content)
+
+
+class FulltextPrefixQueryTest(TestCase):
+    """Test the BOOLEAN MODE expression built for search suggestions."""
+    
+    def test_all_terms_required(self):
+        """Indexable words are required and the last one is a prefix."""
+        self.assertEqual(fulltext_prefix_query("chest pain"), "+chest +pain*")
+    
+    def test_short_terms_optional(self):
+        """Words below the InnoDB minimum token size are not required."""
+        self.assertEqual(fulltext_prefix_query("of hea"), "of +hea*")
+    
+    def test_no_indexable_term(self):
+        """Nothing long enough to match FULLTEXT: empty, so the view falls back to LIKE."""
+        self.assertEqual(fulltext_prefix_query("ab cd"), "")
+        self.assertEqual(fulltext_prefix_query("!!"), "")
+
+
+class WebsearchToBooleanTest(TestCase):
+    """Test web-search syntax translation to a MySQL BOOLEAN MODE query."""
+    
+    def test_terms_required(self):
+        """Plain terms are all required."""
+        self.assertEqual(_websearch_to_boolean("chest pain"), "+chest +pain")
+    
+    def test_phrase_and_negation(self):
+        """Quoted text is a phrase and a leading '-' excludes."""
+        self.assertEqual(_websearch_to_boolean('"chest pain" -fever'), '+"chest pain" -fever')
+        self.assertEqual(_websearch_to_boolean('-"night sweats" cough'), '-"night sweats" +cough')
+    
+    def test_or_makes_both_optional(self):
+        """'or' between two terms makes both optional, other terms stay required."""
+        self.assertEqual(_websearch_to_boolean("cough or fever"), "cough fever")
+        self.assertEqual(_websearch_to_boolean("asthma cough OR wheeze"), "+asthma cough wheeze")
+    
+    def test_short_terms_optional(self):
+        """Terms below the FULLTEXT minimum token size are never required."""
+        self.assertEqual(_websearch_to_boolean("ct of chest"), "ct of +chest")
+    
+    def test_operator_characters_dropped(self):
+        """Stray boolean-mode operators in user input are stripped."""
+        self.assertEqual(_websearch_to_boolean("pain* (acute) ~fever"), "+pain +acute +fever")
+    
+    def test_exclusion_only(self):
+        """Only exclusions (or nothing) yields an empty query."""
+        self.assertEqual(_websearch_to_boolean("-fever"), "")
+        self.assertEqual(_websearch_to_boolean('-"chest pain" -cough'), "")
+        self.assertEqual(_websearch_to_boolean(""), "")
+
+
+class CombineResultsTest(TestCase):
+    """Test Reciprocal Rank Fusion of FULLTEXT and semantic ranks."""
+    
+    def setUp(self):
+        self.service = HybridSearchService()
+        # FULLTEXT order: 1, 2, 3
+        self.candidates = [
+            {
+                'id': i,
+                'encounter_id': 1,
+                'content_type': 'soap',
+                'content_id': i,
+                'title': f'Item {i}',
+                'keyword_relevance': 10.0 - i,
+                'metadata': {},
+            }
+            for i in (1, 2, 3)
+        ]
+    
+    def test_without_embeddings_keeps_fulltext_order(self):
+        """No embeddings: FULLTEXT order, truncated to limit, FULLTEXT-only scores."""
+        results = self.service._combine_results(self.candidates, {}, limit=2)
+        
+        self.assertEqual([r['id'] for r in results], [1, 2])
+        self.assertAlmostEqual(results[0]['combined_score'], 0.6 / 61)
+        self.assertAlmostEqual(results[1]['combined_score'], 0.6 / 62)
+        self.assertTrue(all(r['search_type'] == 'full_text' for r in results))
+    
+    def test_with_embeddings_fuses_ranks(self):
+        """Semantic rank lifts item 3 above item 2, which has no embedding."""
+        semantic_dist = {(1, 'soap', 3): 0.1, (1, 'soap', 1): 0.5}
+        
+        results = self.service._combine_results(self.candidates, semantic_dist, limit=2)
+        
+        self.assertEqual([r['id'] for r in results], [1, 3])
+        self.assertAlmostEqual(results[0]['combined_score'], 0.6 / 61 + 0.4 / 62)
+        self.assertAlmostEqual(results[1]['combined_score'], 0.6 / 63 + 0.4 / 61)
+        self.assertEqual(results[1]['search_type'], 'hybrid')
+        self.assertAlmostEqual(results[1]['semantic_similarity'], 0.9)
+    
+    def test_limit_covering_all_candidates(self):
+        """limit >= number of candidates returns every candidate, fully ranked."""
+        semantic_dist = {(1, 'soap', 3): 0.1, (1, 'soap', 1): 0.5}
+        
+        for limit in (3, 10):
+            results = self.service._combine_results(self.candidates, semantic_dist, limit=limit)
+            self.assertEqual([r['id'] for r in results], [1, 3, 2])
+            self.assertEqual(results[2]['semantic_similarity'], 0.0)
+            self.assertEqual(results[2]['search_type'], 'full_text')
+    
+    def test_equal_scores_keep_fulltext_order(self):
+        """Ties are broken by FULLTEXT rank."""
+        candidates = self.candidates[:2]
+        # Equal weights; item 1 is first in FULLTEXT, item 2 first semantically: both 0.5/61 + 0.5/62
+        semantic_dist = {(1, 'soap', 2): 0.1, (1, 'soap', 1): 0.5}
+        self.service.fts_weight = self.service.semantic_weight = 0.5
+        
+        results = self.service._combine_results(candidates, semantic_dist, limit=2)
+        
+        self.assertEqual([r['id'] for r in results], [1, 2])
+
+
+class RecentResultsReuseTest(TestCase):
+    """Test reuse of recorded results for identical recent searches."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.service = HybridSearchService()
+        encounter = Encounter.objects.create(doctor=self.user, patient_ref="P12345")
+        self.content = SearchableContent.objects.create(
+            encounter=encounter,
+            content_type='soap',
+            content_id=1,
+            title='SOAP',
+            content='Patient reports fever',
+            metadata={'section': 'subjective'}
+        )
+        self.query_hash = self.service._query_hash("fever", {}, 20, True, 300)
+    
+    def _record(self, results_count=1):
+        query = SearchQuery.objects.create(
+            query_text="fever", query_hash=self.query_hash, results_count=results_count
+        )
+        if results_count:
+            SearchResult.objects.create(
+                query=query, content=self.content, relevance_score=0.5, rank=1, snippet='fever'
+            )
+        return query
+    
+    def test_miss_without_recent_query(self):
+        """No identical search recorded: None, so a full search runs."""
+        self.assertIsNone(self.service._recent_results(self.query_hash, 20))
+    
+    def test_miss_when_expired(self):
+        """A search older than the reuse TTL is not reused."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from search.services import SEARCH_RESULT_REUSE_TTL
+        
+        query = self._record()
+        SearchQuery.objects.filter(id=query.id).update(
+            created_at=timezone.now() - timedelta(seconds=SEARCH_RESULT_REUSE_TTL + 1)
+        )
+        
+        self.assertIsNone(self.service._recent_results(self.query_hash, 20))
+    
+    def test_hit_returns_recorded_results(self):
+        """A recent identical search returns its stored results in rank order."""
+        self._record()
+        
+        results = self.service._recent_results(self.query_hash, 20)
+        
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['id'], self.content.id)
+        self.assertEqual(results[0]['content_type'], 'soap')
+        self.assertEqual(results[0]['snippet'], 'fever')
+        self.assertEqual(results[0]['combined_score'], 0.5)
+        self.assertEqual(results[0]['search_type'], 'cached')
+    
+    def test_hit_with_no_results(self):
+        """A recent search that found nothing is reused as an empty list."""
+        self._record(results_count=0)
+        
+        self.assertEqual(self.service._recent_results(self.query_hash, 20), [])
+    
+    def test_search_skips_fulltext_on_hit(self):
+        """search() serves a reuse hit without running the FULLTEXT query."""
+        self._record()
+        
+        with patch.object(self.service, '_full_text_candidates') as mock_fts:
+            response = self.service.search("fever")
+        
+        mock_fts.assert_not_called()
+        self.assertEqual(response['total_count'], 1)
+        self.assertEqual(response['results'][0]['id'], self.content.id)
@@ -294,10 +294,9 @@ class STTTasksTest(TestCase):
         self.assertEqual(result['status'], 'error')
         self.assertIn('Unexpected error', result['error'])
     
-    @patch('stt.tasks.WhisperService')
-    def test_process_bulk_transcription(self, mock_whisper_service):
-        """Test bulk transcription processing"""
-        # Create multiple chunks
+    @patch('stt.tasks.group')
+    def test_process_bulk_transcription(self, mock_group):
+        """Test bulk transcription fans out a group and returns without waiting"""
         chunk2 = AudioChunk.objects.create(
             encounter=self.encounter,
             chunk_number=2,
@@ -306,22 +305,36 @@ class STTTasksTest(TestCase):
             format='m4a'
         )
         
-        # Mock WhisperService
-        mock_service = MagicMock()
-        mock_service.process_chunk.side_effect = [
-            {'status': 'completed', 'chunk_id': self.audio_chunk.id},
-            {'status': 'completed', 'chunk_id': chunk2.id}
-        ]
-        mock_whisper_service.return_value = mock_service
+        # Mock the dispatched group
+        mock_job = MagicMock()
+        mock_job.id = 'group-123'
+        mock_job.results = [MagicMock(id='task-1'), MagicMock(id='task-2')]
+        mock_group.return_value.apply_async.return_value = mock_job
         
-        # Test task
         chunk_ids = [self.audio_chunk.id, chunk2.id]
-        results = process_bulk_transcription(chunk_ids)
+        result = process_bulk_transcription(chunk_ids)
+        
+        self.assertEqual(result['status'], 'queued')
+        self.assertEqual(result['chunks_queued'], 2)
+        self.assertEqual(result['group_id'], 'group-123')
+        self.assertEqual(result['task_ids'], ['task-1', 'task-2'])
+        signatures = list(mock_group.call_args[0][0])
+        self.assertEqual([sig.args for sig in signatures], [(self.audio_chunk.id,), (chunk2.id,)])
+        self.assertTrue(all(sig.kwargs == {'claimed': True} for sig in signatures))
+        mock_job.get.assert_not_called()
+    
+    @patch('stt.tasks.group')
+    def test_process_bulk_transcription_dispatch_error(self, mock_group):
+        """Test claimed chunks are released when the group cannot be queued"""
+        self.audio_chunk.status = 'processing'
+        self.audio_chunk.save()
+        mock_group.return_value.apply_async.side_effect = Exception("Broker down")
+        
+        with self.assertRaises(Exception):
+            process_bulk_transcription([self.audio_chunk.id])
         
-        self.assertEqual(len(results), 2)
-        self.assertEqual(results[0]['status'], 'completed')
-        self.assertEqual(results[1]['status'], 'completed')
-        self.assertEqual(mock_service.process_chunk.call_count, 2)
+        self.audio_chunk.refresh_from_db()
+        self.assertEqual(self.audio_chunk.status, 'committed')
 
 
 class STTViewsTest(APITestCase):
@@ -365,7 +378,25 @@ class STTViewsTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertEqual(response.data['status'], 'processing')
         self.assertEqual(response.data['task_id'], 'task-123')
-        mock_task.assert_called_once_with(self.audio_chunk.id)
+        mock_task.assert_called_once_with(self.audio_chunk.id, claimed=True)
+
+        # The chunk is claimed before the task is queued
+        self.audio_chunk.refresh_from_db()
+        self.assertEqual(self.audio_chunk.status, 'processing')
+    
+    @patch('stt.views.process_audio_stt.delay')
+    def test_transcribe_audio_chunk_enqueue_error(self, mock_task):
+        """Test the chunk is released when the task cannot be queued"""
+        mock_task.side_effect = Exception("Broker down")
+        
+        url = reverse('stt:transcribe-chunk')
+        data = {'chunk_id': self.audio_chunk.id}
+        response = self.client.post(url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertNotIn('Broker down', response.data['error'])
+        self.audio_chunk.refresh_from_db()
+        self.assertEqual(self.audio_chunk.status, 'committed')
     
     def test_transcribe_audio_chunk_not_found(self):
         """Test transcribe with non-existent chunk"""
@@ -482,6 +513,26 @@ class STTViewsTest(APITestCase):
         self.assertEqual(response.data['status'], 'processing')
         self.assertEqual(response.data['task_id'], 'bulk-task-123')
         mock_task.assert_called_once_with([self.audio_chunk.id, chunk2.id])
+
+        # The batch is claimed before the task is queued
+        self.audio_chunk.refresh_from_db()
+        chunk2.refresh_from_db()
+        self.assertEqual(self.audio_chunk.status, 'processing')
+        self.assertEqual(chunk2.status, 'processing')
+
+    @patch('stt.views.process_bulk_transcription.delay')
+    def test_bulk_transcribe_enqueue_error(self, mock_task):
+        """Test the batch is released when the task cannot be queued"""
+        mock_task.side_effect = Exception("Broker down")
+        
+        url = reverse('stt:bulk-transcribe')
+        data = {'chunk_ids': [self.audio_chunk.id]}
+        response = self.client.post(url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertNotIn('Broker down', response.data['error'])
+        self.audio_chunk.refresh_from_db()
+        self.assertEqual(self.audio_chunk.status, 'committed')
     
     def test_bulk_transcribe_invalid_chunks(self):
         """Test bulk transcribe with invalid chunks"""
@@ -491,6 +542,10 @@ class STTViewsTest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('Invalid chunk IDs', response.data['error'])
+
+        # A rejected batch leaves the valid chunks unclaimed
+        self.audio_chunk.refresh_from_db()
+        self.assertEqual(self.audio_chunk.status, 'committed')
     
     def test_transcription_history(self):
         """Test transcription history endpoint"""
@@ -529,17 +584,14 @@ class STTViewsTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('encounter_id', response.data['error'])
     
-    @patch('stt.views.WhisperService')
-    def test_upload_and_transcribe(self, mock_whisper_service):
-        """Test direct upload and transcribe endpoint"""
-        # Mock WhisperService
-        mock_service = MagicMock()
-        mock_service.transcribe_audio.return_value = {
-            'text': 'Direct transcription',
-            'segments': [],
-            'language': 'en'
-        }
-        mock_whisper_service.return_value = mock_service
+    @patch('stt.views.process_uploaded_audio.delay')
+    @patch('stt.views.get_bucket_name', return_value='test-bucket')
+    @patch('stt.views.get_s3_client')
+    def test_upload_and_transcribe(self, mock_s3_client, mock_bucket, mock_delay):
+        """Test upload and transcribe endpoint queues the transcription"""
+        mock_s3 = MagicMock()
+        mock_s3_client.return_value = mock_s3
+        mock_delay.return_value = MagicMock(id='task-123')
         
         # Create test audio file
         audio_content = b'fake audio content'
@@ -556,9 +608,13 @@ class STTViewsTest(APITestCase):
         }
         response = self.client.post(url, data, format='multipart')
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['text'], 'Direct transcription')
-        self.assertEqual(response.data['language'], 'en')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'processing')
+        self.assertEqual(response.data['task_id'], 'task-123')
+        
+        object_key = mock_s3.upload_fileobj.call_args[0][2]
+        self.assertTrue(object_key.endswith('/test.m4a'))
+        mock_delay.assert_called_once_with(object_key, 'test.m4a', 'en')
     
     def test_upload_and_transcribe_no_file(self):
         """Test upload and transcribe without file"""